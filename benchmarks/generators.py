@@ -0,0 +1,145 @@
+"""
+Générateurs de données synthétiques pour les benchmarks
+=======================================================
+
+Données déterministes (graine fixe) au format réel du pipeline :
+- messages WebSocket Binance @trade (entrée de ws_binance.on_message)
+- lignes NDJSON écrites par le backend
+- bougies horaires (DataFrame de get_latest_binance_data)
+- réponse d'agrégation Elasticsearch (fixture de get_latest_candles) : synthétique,
+  au format de la requête _candles_query, pas une réponse capturée sur un cluster
+
+Utilisation:
+    python benchmarks/generators.py    # régénère benchmarks/fixtures/
+"""
+
+import os
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+ES_HOURLY_FIXTURE = os.path.join(FIXTURES_DIR, 'es_hourly_aggs_168h.json')
+
+START_MS = 1_735_689_600_000  # 2025-01-01T00:00:00Z
+
+# Symboles collectés par binance-backend
+SYMBOLS = ('BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'BNBUSDT')
+
+
+def random_walk(n: int, start: float = 95_000.0, volatility: float = 0.002, seed: int = 42) -> np.ndarray:
+    """Prix en marche aléatoire géométrique"""
+    rng = np.random.default_rng(seed)
+    return start * np.exp(np.cumsum(rng.normal(0, volatility, n)))
+
+
+def trade_messages(n: int, symbol: str = 'BTCUSDT', seed: int = 42) -> list:
+    """Messages bruts du flux wss://stream.binance.com/ws/<symbol>@trade"""
+    rng = np.random.default_rng(seed)
+    prices = random_walk(n, seed=seed, volatility=0.0001)
+    quantities = rng.exponential(0.05, n)
+    times = START_MS + np.cumsum(rng.integers(1, 200, n))
+    return [
+        json.dumps({
+            'e': 'trade', 'E': int(t) + 3, 's': symbol, 't': 1_000_000 + i,
+            'p': f"{p:.2f}", 'q': f"{q:.5f}", 'T': int(t), 'm': bool(i % 3 == 0), 'M': True,
+        })
+        for i, (t, p, q) in enumerate(zip(times, prices, quantities))
+    ]
+
+
+def ndjson_trades(n: int, symbol: str = 'BTCUSDT', seed: int = 42) -> bytes:
+    """Bloc NDJSON au format écrit par ws_binance.on_message"""
+    lines = []
+    for message in trade_messages(n, symbol, seed):
+        data = json.loads(message)
+        ts = datetime.fromtimestamp(data['T'] / 1000, tz=timezone.utc).replace(tzinfo=None)
+        lines.append(json.dumps({
+            'symbol': symbol, 'timestamp': ts.isoformat(), 'timestamp_local': ts.isoformat(),
+            'price': float(data['p']), 'quantity': float(data['q']), 'trade_id': data['t'],
+            'buyer_market_maker': data['m'], 'service': 'binance-websocket', 'level': 'info',
+            'message': f"Trade {symbol}: {data['p']} @ {data['q']}", 'event_time': data['E'],
+            'trade_time': data['T'], 'type': 'binance-trade',
+        }))
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def hourly_candles(n: int, seed: int = 42):
+    """DataFrame OHLCV horaire au format de get_latest_binance_data"""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    closes = random_walk(n, seed=seed)
+    opens = np.concatenate([[closes[0]], closes[:-1]])
+    spread = np.abs(rng.normal(0, 0.001, n)) * closes
+    return pd.DataFrame({
+        'Date': pd.date_range('2025-01-01', periods=n, freq='h', tz='UTC'),
+        'Open': opens,
+        'High': np.maximum(opens, closes) + spread,
+        'Low': np.minimum(opens, closes) - spread,
+        'Close': closes,
+        'Volume': rng.exponential(50, n),
+        'Trades_Count': rng.integers(1_000, 20_000, n),
+    })
+
+
+def es_hourly_response(n_hours: int = 168, seed: int = 42, symbols: tuple = ('BTCUSDT',)) -> dict:
+    """Réponse Elasticsearch de la requête terms + date_histogram de get_latest_candles"""
+    symbol_buckets = []
+    for offset, symbol in enumerate(symbols):
+        candles = hourly_candles(n_hours, seed + offset)
+        buckets = []
+        for row in candles.itertuples():
+            key = int(row.Date.timestamp() * 1000)
+            buckets.append({
+                'key_as_string': row.Date.strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+                'key': key,
+                'doc_count': int(row.Trades_Count),
+                'ohlc': {'count': int(row.Trades_Count), 'min': row.Low, 'max': row.High,
+                         'avg': (row.High + row.Low) / 2, 'sum': (row.High + row.Low) / 2 * row.Trades_Count},
+                'first_price': {'top': [{'sort': [key], 'metrics': {'price': row.Open}}]},
+                'last_price': {'top': [{'sort': [key + 3_599_999], 'metrics': {'price': row.Close}}]},
+                'volume': {'value': row.Volume},
+                'trade_count': {'value': int(row.Trades_Count)},
+            })
+        # Trace propre au symbole : les paires moins actives ont un dernier trade plus ancien
+        last_trade = buckets[-1]['key'] + 3_599_999 - offset * 45_000
+        symbol_buckets.append({
+            'key': symbol,
+            'doc_count': sum(b['doc_count'] for b in buckets),
+            'price_over_time': {'buckets': buckets},
+            'last_trade_time': {'value': float(last_trade), 'value_as_string': str(last_trade)},
+            'latency_trace': {
+                'doc_count': 4_812 // (offset + 1),
+                'trade_time': {'value': last_trade - 150_000.0},
+                'event_time': {'value': last_trade - 149_996.0},
+                'ingest_time': {'value': last_trade - 149_871.0 - offset * 20},
+                'logstash_time': {'value': last_trade - 149_412.0},
+                'last_logstash_time': {'value': last_trade + 488.0},
+            },
+        })
+    return {
+        'took': 42, 'timed_out': False,
+        '_shards': {'total': 7, 'successful': 7, 'skipped': 0, 'failed': 0},
+        'hits': {'total': {'value': 10000, 'relation': 'gte'}, 'max_score': None, 'hits': []},
+        'aggregations': {
+            'by_symbol': {'doc_count_error_upper_bound': 0, 'sum_other_doc_count': 0, 'buckets': symbol_buckets},
+        },
+    }
+
+
+def load_fixture(path: str = ES_HOURLY_FIXTURE) -> dict:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def main():
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    with open(ES_HOURLY_FIXTURE, 'w') as f:
+        json.dump(es_hourly_response(168), f)
+    print(f"✅ Fixture écrite: {ES_HOURLY_FIXTURE}")
+
+
+if __name__ == '__main__':
+    main()
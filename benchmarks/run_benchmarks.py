@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Benchmarks reproductibles du pipeline Binance
+=============================================
+
+Mesure, hors ligne et sur données synthétiques déterministes :
+- ingestion : ws_binance.on_message (écriture NDJSON, ring buffers mmap et
+  CandleBuilder comme en production, Logstash neutralisé)
+- agrégation : parsing + OHLCV d'un bloc NDJSON (ndjson_ohlcv_aggregator)
+- features : create_features et _feature_row (ligne de prédiction)
+- entraînement : train_xgboost_model
+- parsing ES : get_latest_binance_data sur la fixture d'agrégation (synthétique,
+  générée par generators.py), get_latest_candles sur une réponse multi-symboles
+- inférence : NumpyBooster sur une ligne, trajectoire récursive 24 h de 4 symboles
+
+Les résultats (médiane/min par opération) sont écrits en JSON. Avec --baseline,
+le script échoue (code 1) si un min dépasse la référence de plus de --threshold :
+le min des séries est la mesure la moins sensible à la charge de la machine.
+Avec --runs N, la suite est parcourue N fois (passes entrelacées : une période
+de charge de la machine ne touche pas toutes les mesures d'un même benchmark) et
+on retient la médiane des N mesures.
+
+benchmarks/baseline.json est la référence versionnée ; la machine qui l'a produite
+est décrite dans son champ "machine" ; elle est enregistrée avec --runs 5. Les
+temps dépendent du matériel : sur une autre machine (CI, poste), régénérer d'abord
+la référence sur cette machine à partir du commit de base, puis comparer les
+modifications à celle-ci. Sur la machine de référence, deux passes sans
+changement de code s'écartent jusqu'à x1.5 sur le min d'une opération courte :
+la comparaison se fait sur la médiane de 3 passes (défaut) et le seuil par
+défaut (+50 %) laisse passer le bruit restant.
+
+Utilisation:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --runs 5 --save-baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+from contextlib import redirect_stdout
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'model'), os.path.join(ROOT, 'binance-backend'), os.path.dirname(os.path.abspath(__file__))]
+
+import numpy as np
+
+import generators
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str, number: int):
+    """Enregistrer une fonction de préparation qui retourne l'opération à chronométrer"""
+    def register(setup):
+        BENCHMARKS[name] = (setup, number)
+        return setup
+    return register
+
+
+def measure(operation, number: int, repeat: int) -> dict:
+    """Médiane et min du temps par opération sur `repeat` séries de `number` appels"""
+    operation()  # échauffement (imports, caches)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        timings.append((time.perf_counter() - start) / number)
+    return {
+        'median_s': statistics.median(timings),
+        'min_s': min(timings),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def combine_runs(measures: list) -> dict:
+    """Médiane, sur plusieurs passes de la suite, de la médiane et du min de measure()"""
+    return {
+        'median_s': statistics.median(m['median_s'] for m in measures),
+        'min_s': statistics.median(m['min_s'] for m in measures),
+        'number': measures[0]['number'],
+        'repeat': measures[0]['repeat'],
+        'runs': len(measures),
+    }
+
+
+# ---------------------------------------------------------------------- contexte
+
+class BenchContext:
+    """Répertoire temporaire, predictor configuré hors ligne, données générées une fois"""
+
+    def __init__(self):
+        self.workdir = tempfile.mkdtemp(prefix='binance-bench-')
+        os.environ['NDJSON_DIR'] = os.path.join(self.workdir, 'data')
+        os.environ['LOGS_DIR'] = os.path.join(self.workdir, 'logs')
+        os.chdir(self.workdir)
+
+        config_path = os.path.join(self.workdir, 'elk_config.json')
+        with open(config_path, 'w') as f:
+            json.dump({'artifacts_dir': os.path.join(self.workdir, 'artifacts')}, f)
+
+        from realtime_prediction_service import ElkRealtimePredictor
+        self.predictor = ElkRealtimePredictor(config_path)
+        logging.getLogger().setLevel(logging.WARNING)
+
+        self.candles = generators.hourly_candles(500)
+        self.es_fixture = generators.load_fixture()
+
+    def close(self):
+        os.chdir(ROOT)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class FixtureES:
+    """Client Elasticsearch factice qui rejoue une réponse fixe (fixture synthétique)"""
+
+    def __init__(self, response: dict):
+        self.response = response
+
+    def search(self, index=None, body=None, **kwargs):
+        return self.response
+
+    def index(self, index=None, body=None, **kwargs):
+        return {'result': 'created'}
+
+
+# ---------------------------------------------------------------------- benchmarks
+
+@benchmark('ingest.on_message', number=2000)
+def bench_on_message(ctx: BenchContext):
+    import ws_binance
+    from candles import CandleBuilder
+    from tick_ring import SymbolRings
+
+    ws_binance.send_to_logstash = lambda trade: None
+    # Chemin de production complet : rings mmap (capacités par défaut) et bougies courtes
+    ws_binance.TICK_RINGS['btcusdt'] = SymbolRings(
+        os.path.join(ctx.workdir, 'ring'), 'btcusdt',
+        ws_binance.RING_TRADE_CAPACITY, ws_binance.RING_CANDLE_CAPACITY
+    )
+    new_builder = lambda: CandleBuilder('BTCUSDT', ws_binance.CANDLE_INTERVAL_SECONDS * 1000)
+    handler = ws_binance.on_message('btcusdt')
+    # ~200 s de trades : plusieurs bougies fermées (et écrites dans le ring) par passe
+    messages = generators.trade_messages(2000)
+    state = {'i': 0}
+    sink = io.StringIO()
+
+    def operation():
+        if state['i'] % len(messages) == 0:
+            # Rejeu depuis le début : sans nouveau builder, les trades seraient « en retard »
+            ws_binance.CANDLE_BUILDERS['btcusdt'] = new_builder()
+        with redirect_stdout(sink):
+            handler(None, messages[state['i'] % len(messages)])
+        state['i'] += 1
+        if state['i'] % 2000 == 0:
+            sink.seek(0)
+            sink.truncate()
+    return operation
+
+
+@benchmark('aggregate.ndjson_chunk_10k', number=20)
+def bench_ndjson_chunk(ctx: BenchContext):
+    from ndjson_ohlcv_aggregator import parse_chunk, aggregate_chunk
+
+    chunk = generators.ndjson_trades(10_000)
+
+    def operation():
+        trade_time, price, quantity, _ = parse_chunk(chunk)
+        aggregate_chunk(trade_time, price, quantity, 60_000)
+    return operation
+
+
+@benchmark('features.create_features_500', number=20)
+def bench_create_features(ctx: BenchContext):
+    prices = ctx.candles['Close'].values / ctx.candles['Close'].max()
+    return lambda: ctx.predictor.create_features(prices, lookback=10)
+
+
+@benchmark('features.next_row', number=2000)
+def bench_feature_row(ctx: BenchContext):
+    prices = ctx.candles['Close'].values[-31:] / ctx.candles['Close'].max()
+    return lambda: ctx.predictor._feature_row(prices, len(prices), 10)
+
+
+@benchmark('train.xgboost_500', number=3)
+def bench_train(ctx: BenchContext):
+    return lambda: ctx.predictor.train_xgboost_model(ctx.candles)
+
+
+@benchmark('es.parse_hourly_168', number=100)
+def bench_es_parse(ctx: BenchContext):
+    client = FixtureES(ctx.es_fixture)
+    ctx.predictor.connected = True
+
+    def operation():
+        # Predictor partagé avec es.parse_multi_4x168, les passes étant entrelacées
+        ctx.predictor.es_client = client
+        return ctx.predictor.get_latest_binance_data(hours_back=168)
+    return operation
+
+
+@benchmark('es.parse_multi_4x168', number=100)
+def bench_es_parse_multi(ctx: BenchContext):
+    client = FixtureES(generators.es_hourly_response(168, symbols=generators.SYMBOLS))
+    ctx.predictor.connected = True
+
+    def operation():
+        ctx.predictor.es_client = client
+        return ctx.predictor.get_latest_candles(list(generators.SYMBOLS), hours_back=168)
+    return operation
+
+
+@benchmark('inference.numpy_booster_row', number=200)
+def bench_numpy_booster(ctx: BenchContext):
+    from booster_inference import NumpyBooster
+
+    model, _, _ = ctx.predictor.train_xgboost_model(ctx.candles)
+    path = os.path.join(ctx.workdir, 'bench_model.json')
+    model.get_booster().save_model(path)
+    booster = NumpyBooster.load(path)
+    row = np.random.default_rng(0).random((1, model.n_features_in_))
+    return lambda: booster.predict(row)
+
+
+@benchmark('inference.forecast_4x24', number=20)
+def bench_forecast_paths(ctx: BenchContext):
+    model, _, _ = ctx.predictor.train_xgboost_model(ctx.candles)
+    windows = np.random.default_rng(0).random((len(generators.SYMBOLS), 168))
+    return lambda: ctx.predictor.forecast_paths(model.predict, windows, 24)
+
+
+# ---------------------------------------------------------------------- rapport
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Lister les benchmarks dont le min régresse au-delà du seuil"""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get('results', {}).get(name)
+        if reference is None:
+            continue
+        ratio = result['min_s'] / reference['min_s']
+        result['baseline_ratio'] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks du pipeline Binance (hors ligne)')
+    parser.add_argument('--filter', default='', help='Ne lancer que les benchmarks contenant ce texte')
+    parser.add_argument('--repeat', type=int, default=5, help='Séries par benchmark (défaut: 5)')
+    parser.add_argument('--runs', type=int, default=3,
+                        help='Passes de la suite, médiane retenue (défaut: 3 ; 5 pour une référence)')
+    parser.add_argument('--output', default='bench_results.json', help='Fichier de résultats JSON')
+    parser.add_argument('--baseline', help='Résultats de référence à comparer')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='Régression tolérée sur le min (défaut: 0.5 = +50%%)')
+    parser.add_argument('--save-baseline', help='Écrire aussi les résultats comme nouvelle référence')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    save_baseline = os.path.abspath(args.save_baseline) if args.save_baseline else None
+    ctx = BenchContext()
+    results = {}
+    try:
+        operations = {
+            name: (setup(ctx), number) for name, (setup, number) in BENCHMARKS.items() if args.filter in name
+        }
+        measures = {name: [] for name in operations}
+        for _ in range(max(1, args.runs)):
+            for name, (operation, number) in operations.items():
+                measures[name].append(measure(operation, number, args.repeat))
+        for name, runs in measures.items():
+            results[name] = combine_runs(runs)
+            print(f"{name:32s} médiane {results[name]['median_s'] * 1e3:10.4f} ms   "
+                  f"min {results[name]['min_s'] * 1e3:10.4f} ms")
+    finally:
+        ctx.close()
+
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+        },
+        'results': results,
+    }
+
+    exit_code = 0
+    if baseline_path:
+        with open(baseline_path, 'r') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for name, ratio in regressions:
+            print(f"❌ RÉGRESSION {name}: x{ratio:.2f} (seuil x{1 + args.threshold:.2f})")
+        if regressions:
+            exit_code = 1
+        else:
+            print(f"✅ Aucune régression au-delà de +{args.threshold:.0%}")
+
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Résultats: {output}")
+    if save_baseline:
+        with open(save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Référence: {save_baseline}")
+
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Construction des bougies en streaming
+=====================================
+
+Agrège les trades d'un symbole en bougies OHLCV à intervalle fixe, au fil de
+l'eau (O(1) par trade). Une bougie est émise quand le premier trade de
+l'intervalle suivant arrive.
+
+Chaque bougie porte aussi sa microstructure, calculée à l'ingestion (les trades
+bruts ne sont plus disponibles après l'agrégation horaire) :
+- volumes acheteur / vendeur (côté agresseur), déséquilibre du flux d'ordres
+- VWAP (à partir du volume en quote)
+- nombre de trades par tranche de taille (notionnel USDT)
+- temps inter-trades : moyenne, M2 de Welford et maximum
+"""
+
+# Bornes des tranches de taille (notionnel USDT) : < 1k, < 10k, < 100k, >= 100k
+TRADE_SIZE_BUCKETS_USDT = (1_000, 10_000, 100_000)
+
+
+class CandleBuilder:
+    """Bougies OHLCV d'un symbole, alignées sur des intervalles de interval_ms"""
+
+    def __init__(self, symbol: str, interval_ms: int):
+        self.symbol = symbol
+        self.interval_ms = interval_ms
+        self.current = None
+
+    def _new_candle(self, bucket: int, trade: dict) -> dict:
+        price = trade["price"]
+        return {
+            "symbol": self.symbol,
+            "open_time": bucket * self.interval_ms,
+            "close_time": (bucket + 1) * self.interval_ms - 1,
+            "open": price,
+            "high": price,
+            "low": price,
+            "close": price,
+            "volume": 0.0,
+            "trade_count": 0,
+            # Trace du dernier trade intégré (latence de bout en bout)
+            "last_trade_time": trade["trade_time"],
+            "last_ingest_time_ms": trade.get("ingest_time_ms", 0),
+            # Microstructure
+            "buy_volume": 0.0,
+            "sell_volume": 0.0,
+            "quote_volume": 0.0,
+            "size_counts": [0] * (len(TRADE_SIZE_BUCKETS_USDT) + 1),
+            "gap_mean_ms": 0.0,
+            "gap_m2": 0.0,
+            "gap_max_ms": 0.0,
+        }
+
+    def add_trade(self, trade: dict):
+        """
+        Intégrer un trade ; retourne la bougie fermée si ce trade ouvre un nouvel intervalle.
+
+        Un trade en retard sur une bougie déjà émise est ignoré.
+        """
+        bucket = trade["trade_time"] // self.interval_ms
+        closed = None
+
+        if self.current is None or bucket > self.current["open_time"] // self.interval_ms:
+            closed = self._finalize(self.current)
+            self.current = self._new_candle(bucket, trade)
+        elif bucket < self.current["open_time"] // self.interval_ms:
+            return None
+
+        candle = self.current
+        price = trade["price"]
+        quantity = trade["quantity"]
+        candle["high"] = max(candle["high"], price)
+        candle["low"] = min(candle["low"], price)
+        candle["close"] = price
+        candle["volume"] += quantity
+        candle["trade_count"] += 1
+
+        # Acheteur maker → l'agresseur est le vendeur
+        if trade["buyer_market_maker"]:
+            candle["sell_volume"] += quantity
+        else:
+            candle["buy_volume"] += quantity
+        notional = price * quantity
+        candle["quote_volume"] += notional
+        size_bucket = 0
+        while size_bucket < len(TRADE_SIZE_BUCKETS_USDT) and notional >= TRADE_SIZE_BUCKETS_USDT[size_bucket]:
+            size_bucket += 1
+        candle["size_counts"][size_bucket] += 1
+
+        # Temps inter-trades (Welford) sur les trade_count - 1 intervalles de la bougie
+        if candle["trade_count"] > 1:
+            gap = max(trade["trade_time"] - candle["last_trade_time"], 0)
+            delta = gap - candle["gap_mean_ms"]
+            candle["gap_mean_ms"] += delta / (candle["trade_count"] - 1)
+            candle["gap_m2"] += delta * (gap - candle["gap_mean_ms"])
+            candle["gap_max_ms"] = max(candle["gap_max_ms"], gap)
+
+        candle["last_trade_time"] = trade["trade_time"]
+        candle["last_ingest_time_ms"] = trade.get("ingest_time_ms", 0)
+        return closed
+
+    @staticmethod
+    def _finalize(candle):
+        """Features dérivées de la bougie fermée : VWAP et déséquilibre du flux d'ordres"""
+        if candle is None:
+            return None
+        volume = candle["volume"]
+        candle["vwap"] = candle["quote_volume"] / volume if volume else candle["close"]
+        candle["order_flow_imbalance"] = (candle["buy_volume"] - candle["sell_volume"]) / volume if volume else 0.0
+        return candle
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Agrégateur NDJSON → OHLCV (streaming, mémoire bornée)
+=====================================================
+
+Lit les fichiers NDJSON par symbole écrits par ws_binance.py dans /shared/data
+et produit des bougies OHLCV + nombre de trades par intervalle, sans passer par
+Elasticsearch.
+
+- Lecture par gros blocs via mmap (les pages déjà traitées sont relâchées)
+- Parsing vectorisé des champs utiles (price, quantity, trade_time) avec NumPy
+- Sortie CSV (append) ou Parquet (si pyarrow est installé)
+- Checkpoint de l'offset en octets après chaque bloc écrit : une relance ne traite
+  que les nouvelles lignes, sans doublon même après un arrêt en cours de fichier
+- Un processus par symbole pour utiliser tous les cœurs
+
+Utilisation:
+    python ndjson_ohlcv_aggregator.py
+    python ndjson_ohlcv_aggregator.py --interval 5m --format parquet --workers 4
+"""
+
+import os
+import re
+import sys
+import json
+import mmap
+import glob
+import argparse
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+NDJSON_DIR = "/shared/data"
+OUTPUT_DIR = "/shared/ohlcv"
+
+OHLCV_COLUMNS = ["Date", "Open", "High", "Low", "Close", "Volume", "Trades_Count"]
+
+# Regex de parsing rapide : une passe findall par champ sur tout le bloc
+FIELD_PATTERNS = {
+    "trade_time": re.compile(rb'"trade_time":\s*(\d+)'),
+    "price": re.compile(rb'"price":\s*(-?[0-9.eE+-]+)'),
+    "quantity": re.compile(rb'"quantity":\s*(-?[0-9.eE+-]+)'),
+}
+
+INTERVAL_UNITS_MS = {"s": 1000, "m": 60_000, "h": 3_600_000, "d": 86_400_000}
+
+# Index des valeurs d'un bucket en cours : [first_t, open, high, low, last_t, close, volume, count]
+FIRST_T, OPEN, HIGH, LOW, LAST_T, CLOSE, VOLUME, COUNT = range(8)
+
+
+def parse_interval(interval: str) -> int:
+    """Convertir un intervalle ('1h', '5m', '30s', '1d') en millisecondes"""
+    match = re.fullmatch(r"(\d+)([smhd])", interval.strip())
+    if not match:
+        raise ValueError(f"Intervalle invalide: {interval} (ex: 1h, 5m, 30s, 1d)")
+    return int(match.group(1)) * INTERVAL_UNITS_MS[match.group(2)]
+
+
+def parse_chunk(chunk: bytes):
+    """
+    Extraire trade_time, price et quantity d'un bloc de lignes NDJSON complètes.
+
+    Chemin rapide : findall par champ puis conversion NumPy en une fois.
+    Si le nombre de valeurs ne correspond pas au nombre de lignes (ligne
+    corrompue, format inattendu), on retombe sur json.loads ligne par ligne.
+    """
+    n_lines = chunk.count(b"\n")
+    columns = {name: pattern.findall(chunk) for name, pattern in FIELD_PATTERNS.items()}
+
+    if all(len(values) == n_lines for values in columns.values()):
+        trade_time = np.array(columns["trade_time"]).astype(np.int64)
+        price = np.array(columns["price"]).astype(np.float64)
+        quantity = np.array(columns["quantity"]).astype(np.float64)
+        return trade_time, price, quantity, 0
+
+    trade_time, price, quantity = [], [], []
+    bad_lines = 0
+    for line in chunk.splitlines():
+        if not line.strip():
+            continue
+        try:
+            trade = json.loads(line)
+            trade_time.append(int(trade["trade_time"]))
+            price.append(float(trade["price"]))
+            quantity.append(float(trade["quantity"]))
+        except (ValueError, KeyError, TypeError):
+            bad_lines += 1
+    return (
+        np.array(trade_time, dtype=np.int64),
+        np.array(price, dtype=np.float64),
+        np.array(quantity, dtype=np.float64),
+        bad_lines,
+    )
+
+
+def aggregate_chunk(trade_time: np.ndarray, price: np.ndarray, quantity: np.ndarray, interval_ms: int) -> dict:
+    """Agréger un bloc de trades en buckets OHLCV (entièrement vectorisé)"""
+    if len(trade_time) == 0:
+        return {}
+
+    order = np.argsort(trade_time, kind="stable")
+    trade_time, price, quantity = trade_time[order], price[order], quantity[order]
+    buckets = trade_time // interval_ms
+
+    keys, starts = np.unique(buckets, return_index=True)
+    ends = np.append(starts[1:], len(buckets))
+    last = ends - 1
+
+    highs = np.maximum.reduceat(price, starts)
+    lows = np.minimum.reduceat(price, starts)
+    volumes = np.add.reduceat(quantity, starts)
+
+    return {
+        int(key): [
+            int(trade_time[s]), float(price[s]), float(h), float(lo),
+            int(trade_time[e]), float(price[e]), float(v), int(e - s + 1),
+        ]
+        for key, s, e, h, lo, v in zip(keys, starts, last, highs, lows, volumes)
+    }
+
+
+def merge_bucket(pending: dict, key: int, values: list):
+    """Fusionner un bucket de bloc dans les buckets ouverts"""
+    current = pending.get(key)
+    if current is None:
+        pending[key] = values
+        return
+    if values[FIRST_T] < current[FIRST_T]:
+        current[FIRST_T], current[OPEN] = values[FIRST_T], values[OPEN]
+    if values[LAST_T] >= current[LAST_T]:
+        current[LAST_T], current[CLOSE] = values[LAST_T], values[CLOSE]
+    current[HIGH] = max(current[HIGH], values[HIGH])
+    current[LOW] = min(current[LOW], values[LOW])
+    current[VOLUME] += values[VOLUME]
+    current[COUNT] += values[COUNT]
+
+
+class OhlcvWriter:
+    """
+    Écriture incrémentale des bougies en CSV (append) ou Parquet (un fichier par bloc)
+
+    Sorties idempotentes vis-à-vis du checkpoint :
+    - CSV : le fichier est tronqué à la taille checkpointée (lignes d'une exécution
+      interrompue avant son checkpoint)
+    - Parquet : chaque bloc est écrit dans part-<génération>-<offset de début du bloc>,
+      remplacé atomiquement si le bloc est retraité ; la génération (checkpoint)
+      change à chaque rotation du fichier source, dont les offsets repartent de 0
+    """
+
+    def __init__(self, output_path: str, fmt: str, csv_size: int = None):
+        self.fmt = fmt
+        self.rows_written = 0
+
+        if fmt == "csv":
+            self.path = output_path + ".csv"
+            self._file = open(self.path, "a+")
+            if csv_size is not None and csv_size < self._file.tell():
+                print(f"[CHECKPOINT] {os.path.basename(self.path)} - lignes non checkpointées retirées")
+                self._file.truncate(csv_size)
+                self._file.seek(csv_size)
+            if self._file.tell() == 0:
+                self._file.write(",".join(OHLCV_COLUMNS) + "\n")
+                self._file.flush()
+        else:
+            os.makedirs(output_path, exist_ok=True)
+            self.path = output_path
+
+    def write(self, rows: list, part_name: str):
+        """Écrire les bougies fermées d'un bloc et les rendre durables avant son checkpoint"""
+        if not rows:
+            return
+        if self.fmt == "csv":
+            for row in rows:
+                self._file.write(
+                    f"{row[0]},{row[1]!r},{row[2]!r},{row[3]!r},{row[4]!r},{row[5]!r},{row[6]}\n"
+                )
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.table({col: [row[i] for row in rows] for i, col in enumerate(OHLCV_COLUMNS)})
+            part_path = os.path.join(self.path, f"part-{part_name}.parquet")
+            pq.write_table(table, part_path + ".tmp")
+            os.replace(part_path + ".tmp", part_path)
+        self.rows_written += len(rows)
+
+    def position(self):
+        """Taille du CSV à checkpointer (None en Parquet)"""
+        return self._file.tell() if self.fmt == "csv" else None
+
+    def close(self):
+        if self.fmt == "csv":
+            self._file.close()
+
+
+def bucket_to_row(key: int, values: list, interval_ms: int) -> list:
+    """Convertir un bucket fermé en ligne OHLCV"""
+    date = datetime.fromtimestamp(key * interval_ms / 1000, tz=timezone.utc).isoformat()
+    return [date, values[OPEN], values[HIGH], values[LOW], values[CLOSE], values[VOLUME], values[COUNT]]
+
+
+def load_checkpoint(path: str) -> dict:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    """Écriture atomique du checkpoint (tmp + rename)"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def aggregate_file(ndjson_path: str, output_dir: str, interval: str = "1h",
+                   fmt: str = "csv", chunk_mb: int = 64) -> dict:
+    """
+    Agréger un fichier NDJSON en OHLCV à partir du dernier offset checkpointé.
+
+    Seules les lignes complètes (terminées par '\\n') sont traitées : une ligne en
+    cours d'écriture par le backend sera reprise à la prochaine exécution. Le
+    bucket le plus récent reste ouvert (sauvé dans le checkpoint) tant qu'un
+    bucket plus récent n'est pas apparu.
+
+    Le checkpoint (offset, buckets ouverts, dernier bucket émis, taille du CSV)
+    est sauvé après chaque bloc, une fois ses bougies écrites : un arrêt en cours
+    de fichier reprend au dernier bloc terminé sans dupliquer de bougie.
+
+    Fichier remplacé ou tronqué (rotation) : seul l'offset repart de 0. Le bucket
+    ouvert est conservé et complété par les trades du nouveau fichier, puis écrit
+    dès qu'un bucket plus récent apparaît ; la génération incrémentée évite
+    d'écraser les parts Parquet de l'ancien fichier.
+    """
+    interval_ms = parse_interval(interval)
+    chunk_size = max(1, chunk_mb) * 1024 * 1024
+    name = os.path.splitext(os.path.basename(ndjson_path))[0]
+    output_path = os.path.join(output_dir, f"{name}_ohlcv_{interval}")
+
+    checkpoint_dir = os.path.join(output_dir, ".checkpoints")
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    checkpoint_path = os.path.join(checkpoint_dir, f"{name}_{interval}.json")
+    checkpoint = load_checkpoint(checkpoint_path)
+
+    stat = os.stat(ndjson_path)
+    offset = checkpoint.get("offset", 0)
+    generation = checkpoint.get("generation", 0)
+    if checkpoint.get("inode") not in (None, stat.st_ino) or offset > stat.st_size:
+        print(f"[CHECKPOINT] {name} - fichier remplacé ou tronqué, reprise depuis le début "
+              f"({len(checkpoint.get('pending', {}))} bucket(s) ouvert(s) conservé(s))")
+        offset, generation = 0, generation + 1
+
+    pending = {int(k): v for k, v in checkpoint.get("pending", {}).items()}
+    emitted_upto = checkpoint.get("emitted_upto", -1)
+    summary = {"file": ndjson_path, "start_offset": offset, "trades": 0,
+               "bad_lines": 0, "late_trades": 0, "rows": 0}
+
+    if stat.st_size == offset:
+        summary["end_offset"] = offset
+        return summary
+
+    def checkpoint_state(position: int) -> dict:
+        return {
+            "offset": position,
+            "inode": stat.st_ino,
+            "generation": generation,
+            "interval": interval,
+            "emitted_upto": emitted_upto,
+            "pending": {str(k): v for k, v in pending.items()},
+            "output_size": writer.position(),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    writer = OhlcvWriter(output_path, fmt, csv_size=checkpoint.get("output_size"))
+    pos = offset
+    try:
+        with open(ndjson_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+
+            while pos < size:
+                end = mm.rfind(b"\n", pos, min(pos + chunk_size, size))
+                if end == -1:
+                    # Ligne plus longue qu'un bloc : aller jusqu'à sa fin
+                    end = mm.find(b"\n", pos + chunk_size)
+                    if end == -1:
+                        break
+                end += 1
+
+                trade_time, price, quantity, bad = parse_chunk(mm[pos:end])
+                summary["trades"] += len(trade_time)
+                summary["bad_lines"] += bad
+
+                for key, values in aggregate_chunk(trade_time, price, quantity, interval_ms).items():
+                    if key <= emitted_upto:
+                        # Trade arrivé après la fermeture de son bucket
+                        summary["late_trades"] += values[COUNT]
+                        continue
+                    merge_bucket(pending, key, values)
+
+                # Tous les buckets antérieurs au plus récent sont considérés fermés
+                if len(pending) > 1:
+                    latest = max(pending)
+                    closed = sorted(k for k in pending if k < latest)
+                    writer.write([bucket_to_row(k, pending.pop(k), interval_ms) for k in closed], part_name=f"{generation}-{pos}")
+                    emitted_upto = closed[-1]
+                save_checkpoint(checkpoint_path, checkpoint_state(end))
+
+                # Relâcher les pages déjà traitées pour garder une empreinte mémoire constante
+                if hasattr(mmap, "MADV_DONTNEED"):
+                    release_end = (end // mmap.PAGESIZE) * mmap.PAGESIZE
+                    release_start = (pos // mmap.PAGESIZE) * mmap.PAGESIZE
+                    if release_end > release_start:
+                        mm.madvise(mmap.MADV_DONTNEED, release_start, release_end - release_start)
+                pos = end
+    finally:
+        writer.close()
+
+    summary["end_offset"] = pos
+    summary["rows"] = writer.rows_written
+    summary["output"] = writer.path
+    return summary
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Agrégation NDJSON → OHLCV en streaming")
+    parser.add_argument("--data-dir", default=NDJSON_DIR,
+                        help=f"Répertoire des fichiers NDJSON (défaut: {NDJSON_DIR})")
+    parser.add_argument("--pattern", default="*.ndjson",
+                        help="Motif des fichiers à agréger (défaut: *.ndjson)")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR,
+                        help=f"Répertoire de sortie (défaut: {OUTPUT_DIR})")
+    parser.add_argument("--interval", default="1h",
+                        help="Intervalle des bougies: 30s, 5m, 1h, 1d... (défaut: 1h)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="Format de sortie (défaut: csv)")
+    parser.add_argument("--chunk-mb", type=int, default=64,
+                        help="Taille des blocs lus en Mo (défaut: 64)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Nombre de processus (défaut: nombre de cœurs)")
+    args = parser.parse_args()
+
+    parse_interval(args.interval)
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("[ERROR] pyarrow est requis pour --format parquet (pip install pyarrow)")
+            sys.exit(1)
+
+    files = sorted(glob.glob(os.path.join(args.data_dir, args.pattern)))
+    if not files:
+        print(f"[WARN] Aucun fichier {args.pattern} dans {args.data_dir}")
+        return
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    print(f"[START] Agrégation {len(files)} fichier(s) - intervalle {args.interval} → {args.output_dir}")
+
+    workers = max(1, min(args.workers, len(files)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            path: executor.submit(aggregate_file, path, args.output_dir, args.interval, args.format, args.chunk_mb)
+            for path in files
+        }
+        for path, future in futures.items():
+            try:
+                s = future.result()
+            except Exception as e:
+                print(f"[ERROR] {os.path.basename(path)} - {e}")
+                continue
+            processed_mb = (s["end_offset"] - s["start_offset"]) / 1024 / 1024
+            print(f"[DONE] {os.path.basename(path)} - {processed_mb:.1f} Mo, {s['trades']} trades, "
+                  f"{s['rows']} bougies, {s['late_trades']} trades tardifs, {s['bad_lines']} lignes invalides")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Ring buffers mémoire partagée (mmap) des trades et bougies récents
+==================================================================
+
+Un fichier de taille fixe par symbole et par type d'enregistrement dans le volume
+partagé (/shared/ring). Un seul écrivain (le thread WebSocket du symbole), un
+nombre quelconque de lecteurs (model/tick_ring_reader.py), sans verrou :
+
+- En-tête de 64 octets : magic, version, taille d'enregistrement, capacité,
+  puis write_seq (nombre total d'enregistrements écrits, publié en dernier)
+- Zone de données en miroir : chaque enregistrement est écrit aux slots
+  i et i + capacité. Les N derniers sont donc toujours contigus, ce qui permet
+  au lecteur de les exposer comme une vue NumPy sans copie.
+
+Protocole: l'écrivain écrit l'enregistrement (deux fois) puis incrémente write_seq.
+Un lecteur lit write_seq, prend la vue, et peut vérifier ensuite que l'écrivain
+n'a pas réécrit ces slots (write_seq courant - write_seq lu <= capacité - N).
+
+Les formats ci-dessous doivent rester identiques aux dtypes de model/tick_ring_reader.py.
+"""
+
+import os
+import mmap
+import struct
+
+RING_MAGIC = b"TKRG"
+RING_VERSION = 3
+
+# magic, version, record_size, capacity, write_seq
+HEADER_FORMAT = "<4sIIxxxxQQ"
+HEADER_SIZE = 64
+WRITE_SEQ_OFFSET = struct.calcsize("<4sIIxxxxQ")
+
+# trade_time, event_time, trade_id, price, quantity, buyer_market_maker, ingest_time_ms
+TRADE_FORMAT = "<qqqddqq"
+# open_time, close_time, open, high, low, close, volume, trade_count,
+# puis la trace du dernier trade (trade_time, ingest_time_ms) et l'émission de la bougie,
+# puis la microstructure : buy_volume, sell_volume, quote_volume, 4 tranches de taille,
+# gap_mean_ms, gap_m2, gap_max_ms (sommes brutes : l'agrégation horaire reste exacte)
+CANDLE_FORMAT = "<qqdddddqqqqdddqqqqddd"
+
+
+class RingWriter:
+    """Écrivain unique d'un ring buffer mmap à zone miroir"""
+
+    def __init__(self, path: str, record_format: str, capacity: int):
+        self.record = struct.Struct(record_format)
+        self.capacity = capacity
+        self.path = path
+        size = HEADER_SIZE + 2 * capacity * self.record.size
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        seq = self._existing_seq(path, size)
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+
+        struct.pack_into(HEADER_FORMAT, self._mm, 0, RING_MAGIC, RING_VERSION,
+                         self.record.size, capacity, seq)
+        self.seq = seq
+
+    def _existing_seq(self, path: str, size: int) -> int:
+        """Reprendre le write_seq d'un ring compatible (redémarrage du backend)"""
+        try:
+            with open(path, "rb") as f:
+                header = f.read(struct.calcsize(HEADER_FORMAT))
+            if os.path.getsize(path) != size:
+                return 0
+            magic, version, record_size, capacity, seq = struct.unpack(HEADER_FORMAT, header)
+        except (OSError, struct.error):
+            return 0
+        if (magic, version, record_size, capacity) != (RING_MAGIC, RING_VERSION, self.record.size, self.capacity):
+            return 0
+        return seq
+
+    def append(self, *values):
+        slot = self.seq % self.capacity
+        offset = HEADER_SIZE + slot * self.record.size
+        self.record.pack_into(self._mm, offset, *values)
+        self.record.pack_into(self._mm, offset + self.capacity * self.record.size, *values)
+        # Publication : write_seq n'avance qu'une fois l'enregistrement complet
+        self.seq += 1
+        struct.pack_into("<Q", self._mm, WRITE_SEQ_OFFSET, self.seq)
+
+    def close(self):
+        self._mm.close()
+
+
+class SymbolRings:
+    """Rings trades + bougies d'un symbole"""
+
+    def __init__(self, ring_dir: str, symbol: str, trade_capacity: int, candle_capacity: int):
+        symbol = symbol.lower()
+        self.trades = RingWriter(os.path.join(ring_dir, f"{symbol}.trades.ring"), TRADE_FORMAT, trade_capacity)
+        self.candles = RingWriter(os.path.join(ring_dir, f"{symbol}.candles.ring"), CANDLE_FORMAT, candle_capacity)
+
+    def write_trade(self, trade: dict):
+        self.trades.append(
+            trade["trade_time"], trade["event_time"], trade["trade_id"],
+            trade["price"], trade["quantity"], int(trade["buyer_market_maker"]),
+            trade.get("ingest_time_ms", 0),
+        )
+
+    def write_candle(self, candle: dict):
+        self.candles.append(
+            candle["open_time"], candle["close_time"], candle["open"], candle["high"],
+            candle["low"], candle["close"], candle["volume"], candle["trade_count"],
+            candle["last_trade_time"], candle["last_ingest_time_ms"], candle.get("emitted_time_ms", 0),
+            candle["buy_volume"], candle["sell_volume"], candle["quote_volume"], *candle["size_counts"],
+            candle["gap_mean_ms"], candle["gap_m2"], candle["gap_max_ms"],
+        )
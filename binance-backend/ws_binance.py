@@ -7,6 +7,9 @@ import os
 import pytz
 import requests
 
+from candles import CandleBuilder
+from tick_ring import SymbolRings
+
 # Dictionnaire des symboles Binance → fichiers de sortie
 SYMBOLS = {
     "btcusdt": "btc_usdt.ndjson",
@@ -15,12 +18,22 @@ SYMBOLS = {
     "bnbusdt": "bnb_usdt.ndjson"
 }
 
-NDJSON_DIR = "/shared/data"
-LOGS_DIR = "/shared/logs"
+NDJSON_DIR = os.getenv('NDJSON_DIR', "/shared/data")
+LOGS_DIR = os.getenv('LOGS_DIR', "/shared/logs")
 
 # Configuration Logstash (optionnel - pour envoyer directement à Logstash)
 LOGSTASH_URL = os.getenv('LOGSTASH_URL', 'http://logstash:8080')
 
+# Ring buffers mmap des trades/bougies récents, lus sans réseau par le predictor
+RING_DIR = os.getenv('RING_DIR', '/shared/ring')
+RING_TRADE_CAPACITY = int(os.getenv('RING_TRADE_CAPACITY', 65536))
+RING_CANDLE_CAPACITY = int(os.getenv('RING_CANDLE_CAPACITY', 16384))
+CANDLE_INTERVAL_SECONDS = int(os.getenv('CANDLE_INTERVAL_SECONDS', 60))
+
+# Un écrivain par symbole (rings et bougies), créés au démarrage
+TICK_RINGS = {}
+CANDLE_BUILDERS = {}
+
 # Crée les dossiers si non existants
 os.makedirs(NDJSON_DIR, exist_ok=True)
 os.makedirs(LOGS_DIR, exist_ok=True)
@@ -41,6 +54,8 @@ def send_to_logstash(trade_data):
 
 def on_message(symbol):
     def handler(ws, message):
+        # Horodatage de réception (trace de latence : Binance T/E → backend → Logstash → ES)
+        ingest_time_ms = int(time.time() * 1000)
         data = json.loads(message)
         timestamp_utc = datetime.utcfromtimestamp(data['T'] / 1000)
         timestamp_local = timestamp_utc.replace(tzinfo=pytz.utc).astimezone(pytz.timezone("Europe/Paris"))
@@ -58,6 +73,7 @@ def on_message(symbol):
             "message": f"Trade {symbol.upper()}: {data['p']} @ {data['q']}",
             "event_time": data['E'],
             "trade_time": data['T'],
+            "ingest_time_ms": ingest_time_ms,
             "type": "binance-trade"
         }
 
@@ -66,6 +82,15 @@ def on_message(symbol):
         with open(file_path, "a") as f:
             f.write(json.dumps(trade) + "\n")
 
+        # Ring buffer mémoire partagée (trades + bougies fermées)
+        rings = TICK_RINGS.get(symbol)
+        if rings is not None:
+            rings.write_trade(trade)
+            closed_candle = CANDLE_BUILDERS[symbol].add_trade(trade)
+            if closed_candle is not None:
+                closed_candle["emitted_time_ms"] = int(time.time() * 1000)
+                rings.write_candle(closed_candle)
+
         # Envoie directement à Logstash (optionnel)
         send_to_logstash(trade)
 
@@ -102,6 +127,14 @@ if __name__ == "__main__":
     print("[START] Binance WebSocket to ELK Stack")
     print(f"[CONFIG] Logstash URL: {LOGSTASH_URL}")
     print(f"[CONFIG] Data directory: {NDJSON_DIR}")
+    print(f"[CONFIG] Ring buffers: {RING_DIR} ({RING_TRADE_CAPACITY} trades, {RING_CANDLE_CAPACITY} bougies {CANDLE_INTERVAL_SECONDS}s)")
+    
+    for symbol in SYMBOLS:
+        try:
+            TICK_RINGS[symbol] = SymbolRings(RING_DIR, symbol, RING_TRADE_CAPACITY, RING_CANDLE_CAPACITY)
+            CANDLE_BUILDERS[symbol] = CandleBuilder(symbol.upper(), CANDLE_INTERVAL_SECONDS * 1000)
+        except OSError as e:
+            print(f"[RING ERROR] {symbol.upper()} - {e}")
     
     threads = []
     for symbol in SYMBOLS:
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Exporteur Binance paginé et parallèle - Elasticsearch → CSV/Parquet
+===================================================================
+
+Remplace la grosse requête date_histogram unique de export-bitcoin-hourly-fixed.sh
+(qui renvoie un export vide dès que le nombre de buckets ou la taille de réponse
+devient trop grand) par:
+
+- Mode hourly : agrégation `composite` paginée (after_key) par symbole et tranche
+  de temps, first/last price via `top_metrics`
+- Mode trades : point-in-time + `slice` + `search_after` pour les trades bruts
+- Tâches (symbole × tranche de temps × slice) exécutées en parallèle ; les tranches
+  sont alignées sur --interval, un bucket n'est donc jamais partagé entre deux tâches
+- Lignes écrites au fil de l'eau dans des fichiers part, puis concaténées par tranche
+  dans l'ordre chronologique. En mode trades, les slices PIT d'une même tranche sont
+  concaténés l'un après l'autre : chaque slice est chronologique, pas la tranche
+  (trier sur trade_time si l'ordre global est nécessaire)
+- Reprise (--resume) à partir de l'état sauvegardé après chaque page
+
+Utilisation:
+    python export_binance_hourly.py                       # Tout l'historique BTCUSDT, par heure
+    python export_binance_hourly.py --days 30 --symbols BTCUSDT,ETHUSDT
+    python export_binance_hourly.py --mode trades --days 7 --format parquet
+    python export_binance_hourly.py --resume              # Reprendre un export interrompu
+"""
+
+import os
+import re
+import sys
+import csv
+import json
+import shutil
+import argparse
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from elasticsearch import Elasticsearch
+import urllib3
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+HOURLY_COLUMNS = ["Date", "Symbol", "Open", "High", "Low", "Close", "Volume", "Trades_Count"]
+TRADE_COLUMNS = ["timestamp", "symbol", "price", "quantity", "trade_id", "buyer_market_maker", "trade_time"]
+
+# Unités de fixed_interval (date_histogram) acceptées pour --interval
+INTERVAL_UNITS_MS = {"ms": 1, "s": 1000, "m": 60_000, "h": 3_600_000, "d": 86_400_000}
+
+
+def interval_to_ms(interval: str) -> int:
+    """Convertir un fixed_interval Elasticsearch ('1h', '15m', '1d') en millisecondes"""
+    match = re.fullmatch(r"(\d+)(ms|s|m|h|d)", interval.strip())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Intervalle invalide: {interval} (ex: 1h, 15m, 1d)")
+    return int(match.group(1)) * INTERVAL_UNITS_MS[match.group(2)]
+
+
+class ExportState:
+    """État de reprise partagé entre les threads, sauvegardé atomiquement sur disque"""
+
+    def __init__(self, path: str, data: dict):
+        self.path = path
+        self.data = data
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "r") as f:
+            return cls(path, json.load(f))
+
+    def task(self, task_id: str) -> dict:
+        return self.data["tasks"][task_id]
+
+    def update_task(self, task_id: str, **fields):
+        with self._lock:
+            self.data["tasks"][task_id].update(fields)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.data, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+class PartWriter:
+    """Écriture d'un fichier part (CSV en append tronqué à l'offset sûr, ou Parquet)"""
+
+    def __init__(self, path: str, columns: list, fmt: str, resume_offset: int = 0):
+        self.path = path
+        self.columns = columns
+        self.fmt = fmt
+        self._parquet_writer = None
+
+        if fmt == "csv":
+            self._file = open(path, "a+", newline="")
+            # Supprimer une éventuelle page écrite mais non enregistrée dans l'état
+            self._file.truncate(resume_offset)
+            self._file.seek(resume_offset)
+            self._csv = csv.writer(self._file)
+            if resume_offset == 0:
+                self._csv.writerow(columns)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def write(self, rows: list) -> int:
+        """Écrire une page de lignes et retourner l'offset sûr pour la reprise"""
+        if self.fmt == "csv":
+            self._csv.writerows(rows)
+            self._file.flush()
+            return self._file.tell()
+
+        if rows:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.table({col: [row[i] for row in rows] for i, col in enumerate(self.columns)})
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        return 0
+
+    def close(self):
+        if self.fmt == "csv":
+            self._file.close()
+        elif self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+class BinanceExporter:
+    """Export paginé et parallèle des données Binance depuis Elasticsearch"""
+
+    def __init__(self, args):
+        self.args = args
+        self.es = Elasticsearch(
+            [f"{'https' if args.use_ssl else 'http'}://{args.host}:{args.port}"],
+            basic_auth=(args.user, args.password),
+            verify_certs=False,
+            request_timeout=args.timeout,
+            retry_on_timeout=True,
+            max_retries=3,
+        )
+        self.pit_id = None
+
+    # ------------------------------------------------------------------ plan
+
+    def _symbol_filter(self, symbol: str) -> dict:
+        return {"term": {self.args.symbol_field: symbol}}
+
+    def _time_bounds(self, symbol: str):
+        """Bornes min/max de l'historique d'un symbole (requête légère)"""
+        response = self.es.search(index=self.args.index, body={
+            "size": 0,
+            "query": self._symbol_filter(symbol),
+            "aggs": {
+                "min_time": {"min": {"field": self.args.time_field}},
+                "max_time": {"max": {"field": self.args.time_field}},
+            },
+        })
+        aggs = response["aggregations"]
+        if aggs["min_time"]["value"] is None:
+            return None
+        return int(aggs["min_time"]["value"]), int(aggs["max_time"]["value"]) + 1
+
+    def plan(self) -> dict:
+        """Découper l'export en tâches symbole × tranche de temps (× slice en mode trades)"""
+        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+        interval_ms = interval_to_ms(self.args.interval)
+        # Tranches multiples de l'intervalle (buckets fixed_interval alignés sur l'epoch en UTC)
+        slice_ms = -(-self.args.slice_days * 86_400_000 // interval_ms) * interval_ms
+        tasks = {}
+
+        for symbol in self.args.symbols:
+            if self.args.days:
+                start_ms, end_ms = now_ms - self.args.days * 86_400_000, now_ms
+            else:
+                bounds = self._time_bounds(symbol)
+                if bounds is None:
+                    print(f"⚠️  Aucune donnée pour {symbol}")
+                    continue
+                start_ms, end_ms = bounds
+
+            # Aligner les tranches sur l'intervalle pour ne pas couper un bucket en deux
+            start_ms -= start_ms % interval_ms
+            for range_start in range(start_ms, end_ms, slice_ms):
+                range_end = min(range_start + slice_ms, end_ms)
+                n_slices = self.args.pit_slices if self.args.mode == "trades" else 1
+                for slice_id in range(n_slices):
+                    task_id = f"{symbol}_{range_start}_{slice_id}"
+                    tasks[task_id] = {
+                        "symbol": symbol, "gte": range_start, "lt": range_end,
+                        "slice_id": slice_id, "slices": n_slices,
+                        "done": False, "after": None, "offset": 0, "rows": 0,
+                    }
+        return tasks
+
+    # ------------------------------------------------------------------ tasks
+
+    def _range_query(self, task: dict) -> dict:
+        return {
+            "bool": {
+                "filter": [
+                    self._symbol_filter(task["symbol"]),
+                    {"range": {self.args.time_field: {
+                        "gte": task["gte"], "lt": task["lt"], "format": "epoch_millis"
+                    }}},
+                ]
+            }
+        }
+
+    def _hourly_pages(self, task: dict):
+        """Pages de l'agrégation composite (reprise possible via after_key)"""
+        after = task["after"]
+        while True:
+            composite = {
+                "size": self.args.page_size,
+                "sources": [{"hour": {"date_histogram": {
+                    "field": self.args.time_field,
+                    "fixed_interval": self.args.interval,
+                    "time_zone": "UTC",
+                }}}],
+            }
+            if after:
+                composite["after"] = after
+
+            response = self.es.search(index=self.args.index, body={
+                "size": 0,
+                "query": self._range_query(task),
+                "aggs": {"hourly": {
+                    "composite": composite,
+                    "aggs": {
+                        "price_stats": {"stats": {"field": "price"}},
+                        "volume_total": {"sum": {"field": "quantity"}},
+                        "first_price": {"top_metrics": {
+                            "metrics": {"field": "price"},
+                            "sort": {self.args.time_field: "asc"},
+                        }},
+                        "last_price": {"top_metrics": {
+                            "metrics": {"field": "price"},
+                            "sort": {self.args.time_field: "desc"},
+                        }},
+                    },
+                }},
+            })
+
+            agg = response["aggregations"]["hourly"]
+            buckets = agg.get("buckets", [])
+            rows = []
+            for bucket in buckets:
+                stats = bucket["price_stats"]
+                first = bucket["first_price"]["top"]
+                last = bucket["last_price"]["top"]
+                rows.append([
+                    datetime.fromtimestamp(bucket["key"]["hour"] / 1000, tz=timezone.utc).isoformat(),
+                    task["symbol"],
+                    first[0]["metrics"]["price"] if first else stats["min"],
+                    stats["max"],
+                    stats["min"],
+                    last[0]["metrics"]["price"] if last else stats["max"],
+                    bucket["volume_total"]["value"],
+                    bucket["doc_count"],
+                ])
+
+            after = agg.get("after_key")
+            yield rows, after
+            if not buckets or after is None or len(buckets) < self.args.page_size:
+                return
+
+    def _trade_pages(self, task: dict):
+        """Pages de trades bruts via point-in-time + slice + search_after"""
+        search_after = None
+        while True:
+            body = {
+                "size": self.args.page_size,
+                "query": self._range_query(task),
+                "pit": {"id": self.pit_id, "keep_alive": self.args.keep_alive},
+                "sort": [{self.args.time_field: "asc"}, {"_shard_doc": "asc"}],
+                "_source": ["timestamp", "symbol", "price", "quantity",
+                            "trade_id", "buyer_market_maker", "trade_time"],
+                "track_total_hits": False,
+            }
+            if task["slices"] > 1:
+                body["slice"] = {"id": task["slice_id"], "max": task["slices"]}
+            if search_after:
+                body["search_after"] = search_after
+
+            hits = self.es.search(body=body)["hits"]["hits"]
+            rows = [[hit["_source"].get(col) for col in TRADE_COLUMNS] for hit in hits]
+            search_after = hits[-1]["sort"] if hits else None
+            yield rows, None
+            if len(hits) < self.args.page_size:
+                return
+
+    def run_task(self, task_id: str, state: ExportState, parts_dir: str) -> int:
+        task = state.task(task_id)
+        columns = HOURLY_COLUMNS if self.args.mode == "hourly" else TRADE_COLUMNS
+        part_path = os.path.join(parts_dir, f"{task_id}.{self.args.format}")
+
+        # Le composite after_key survit à une interruption ; un slice PIT ou un fichier
+        # Parquet interrompu repart de zéro
+        resumable = self.args.mode == "hourly" and self.args.format == "csv"
+        if not resumable:
+            state.update_task(task_id, after=None, offset=0, rows=0)
+            task = state.task(task_id)
+
+        writer = PartWriter(part_path, columns, self.args.format, resume_offset=task["offset"])
+        rows_total = task["rows"]
+        try:
+            pages = self._hourly_pages(task) if self.args.mode == "hourly" else self._trade_pages(task)
+            for rows, after in pages:
+                offset = writer.write(rows)
+                rows_total += len(rows)
+                state.update_task(task_id, after=after, offset=offset, rows=rows_total)
+        finally:
+            writer.close()
+
+        state.update_task(task_id, done=True)
+        return rows_total
+
+    # ------------------------------------------------------------------ run
+
+    def merge_parts(self, state: ExportState, parts_dir: str) -> list:
+        """Concaténer les fichiers part CSV par symbole, dans l'ordre chronologique"""
+        outputs = []
+        label = state.data["label"]
+        tasks = sorted(state.data["tasks"].items(), key=lambda kv: (kv[1]["symbol"], kv[1]["gte"], kv[1]["slice_id"]))
+
+        for symbol in self.args.symbols:
+            parts = [os.path.join(parts_dir, f"{task_id}.{self.args.format}")
+                     for task_id, task in tasks if task["symbol"] == symbol]
+            parts = [p for p in parts if os.path.exists(p)]
+            if not parts:
+                continue
+
+            if self.args.format == "parquet":
+                # Les fichiers part forment déjà un dataset Parquet lisible d'un bloc
+                dataset_dir = os.path.join(self.args.output_dir, f"{symbol}_{self.args.mode}_{label}")
+                os.makedirs(dataset_dir, exist_ok=True)
+                for part in parts:
+                    shutil.move(part, os.path.join(dataset_dir, os.path.basename(part)))
+                outputs.append(dataset_dir)
+                continue
+
+            output_file = os.path.join(self.args.output_dir, f"{symbol}_{self.args.mode}_data_{label}.csv")
+            with open(output_file, "w", newline="") as out:
+                for i, part in enumerate(parts):
+                    with open(part, "r", newline="") as f:
+                        header = f.readline()
+                        if i == 0:
+                            out.write(header)
+                        shutil.copyfileobj(f, out, 1024 * 1024)
+            outputs.append(output_file)
+        return outputs
+
+    def run(self):
+        os.makedirs(self.args.output_dir, exist_ok=True)
+        run_name = self.args.run_name or f"{self.args.mode}_{'_'.join(self.args.symbols)}_{self.args.days or 'alltime'}"
+        parts_dir = os.path.join(self.args.output_dir, ".parts", run_name)
+        state_path = os.path.join(parts_dir, "state.json")
+
+        if self.args.resume and os.path.exists(state_path):
+            state = ExportState.load(state_path)
+            pending = [t for t, task in state.data["tasks"].items() if not task["done"]]
+            print(f"🔁 Reprise de l'export {run_name} (plan {state.data['label']}): "
+                  f"{len(pending)} tâche(s) restante(s)")
+        else:
+            if os.path.exists(parts_dir):
+                shutil.rmtree(parts_dir)
+            os.makedirs(parts_dir)
+            label = f"{self.args.days}days_" if self.args.days else "alltime_"
+            label += datetime.now().strftime("%Y%m%d_%H%M%S")
+            state = ExportState(state_path, {"label": label, "mode": self.args.mode, "tasks": self.plan()})
+            with open(state_path, "w") as f:
+                json.dump(state.data, f, indent=2)
+            pending = list(state.data["tasks"])
+            print(f"📋 {len(pending)} tâche(s) planifiée(s) pour {', '.join(self.args.symbols)}")
+
+        if self.args.mode == "trades" and pending:
+            self.pit_id = self.es.open_point_in_time(index=self.args.index, keep_alive=self.args.keep_alive)["id"]
+
+        failed = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.args.workers) as executor:
+                futures = {executor.submit(self.run_task, t, state, parts_dir): t for t in pending}
+                for future in as_completed(futures):
+                    task_id = futures[future]
+                    try:
+                        rows = future.result()
+                        print(f"✅ {task_id}: {rows} lignes")
+                    except Exception as e:
+                        failed += 1
+                        print(f"❌ {task_id}: {e}")
+        finally:
+            if self.pit_id:
+                try:
+                    self.es.close_point_in_time(body={"id": self.pit_id})
+                except Exception:
+                    pass
+
+        if failed:
+            print(f"⚠️  {failed} tâche(s) en échec - relancez avec --resume")
+            return 1
+
+        for output in self.merge_parts(state, parts_dir):
+            print(f"📁 {output}")
+        shutil.rmtree(parts_dir, ignore_errors=True)
+        print("✅ Export terminé")
+        return 0
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Export paginé et parallèle des données Binance")
+    parser.add_argument("--host", default=os.getenv("ES_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("ES_PORT", 9200)))
+    parser.add_argument("--user", default=os.getenv("ES_USER", "chater"))
+    parser.add_argument("--password", default=os.getenv("ES_PASSWORD", "Protel2025!"))
+    parser.add_argument("--use-ssl", action="store_true")
+    parser.add_argument("--index", default="binance-trades-*")
+    parser.add_argument("--symbols", default="BTCUSDT",
+                        help="Symboles séparés par des virgules (défaut: BTCUSDT)")
+    parser.add_argument("--symbol-field", default="symbol.keyword")
+    parser.add_argument("--time-field", default="@timestamp")
+    parser.add_argument("--days", type=int, default=0,
+                        help="Nombre de jours à exporter (défaut: 0 = tout l'historique)")
+    parser.add_argument("--mode", choices=["hourly", "trades"], default="hourly",
+                        help="hourly = OHLCV agrégé, trades = trades bruts (défaut: hourly)")
+    parser.add_argument("--interval", default="1h", help="Intervalle des bougies (défaut: 1h)")
+    parser.add_argument("--slice-days", type=int, default=7,
+                        help="Taille des tranches de temps parallélisées (défaut: 7 jours)")
+    parser.add_argument("--pit-slices", type=int, default=2,
+                        help="Slices PIT par tranche en mode trades (défaut: 2)")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--timeout", type=int, default=120, help="Timeout par requête en secondes")
+    parser.add_argument("--keep-alive", default="5m", help="Durée de vie du point-in-time")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--output-dir", default="./exports")
+    parser.add_argument("--run-name", help="Nom de l'export (clé de reprise)")
+    parser.add_argument("--resume", action="store_true", help="Reprendre un export interrompu")
+    args = parser.parse_args()
+    args.symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+    try:
+        interval_to_ms(args.interval)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("❌ pyarrow est requis pour --format parquet (pip install pyarrow)")
+            sys.exit(1)
+
+    sys.exit(BinanceExporter(args).run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Suivi en ligne de la précision des prédictions
+==============================================
+
+Chaque prédiction vise la clôture de la bougie suivante. Elle reste en attente
+jusqu'à ce que cette bougie soit fermée dans les données récupérées, puis elle
+est jointe au prix réalisé :
+
+- MAE glissante (en $) sur les `window` dernières bougies cibles résolues
+- Précision directionnelle : signe de la variation prédite = signe de la variation réalisée
+- Taux de réussite des signaux : BUY/STRONG_BUY suivis d'une hausse, SELL/STRONG_SELL
+  d'une baisse (les HOLD ne comptent pas)
+
+Une seule attente par (symbole, version de modèle, bougie cible) : avec un cycle
+plus court que la bougie, la prédiction la plus récente remplace les précédentes.
+Chaque bougie cible compte donc une fois, et la fenêtre couvre `window` bougies.
+
+Les statistiques sont tenues par (symbole, version de modèle) avec des sommes
+glissantes : O(1) par prédiction résolue, sans requête sur l'historique.
+L'état (attentes + fenêtres) est persisté dans le répertoire des artefacts pour
+survivre aux redémarrages. Plusieurs processus peuvent partager le fichier :
+save() relit l'état sur disque sous verrou et le fusionne (par bougie cible)
+avant le remplacement atomique.
+
+Utilisation:
+    tracker = OnlineAccuracyTracker(metrics, window=168, state_file='artifacts/accuracy_state.json')
+    tracker.record(symbol, model_version, target_time_ms, current_price, predicted_price, signal)
+    tracker.resolve(symbol, dates_ms, closes)
+    tracker.snapshot(symbol, model_version)
+"""
+
+import os
+import json
+import fcntl
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Prédictions en attente conservées par symbole (au-delà, les plus anciennes sont abandonnées)
+MAX_PENDING = 2000
+
+BUY_SIGNALS = ('BUY', 'STRONG_BUY')
+SELL_SIGNALS = ('SELL', 'STRONG_SELL')
+
+
+class RollingAccuracy:
+    """Statistiques glissantes sur les `window` dernières bougies cibles résolues"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._reset()
+
+    def _reset(self):
+        # (target_time_ms, abs_error, direction_hit, signal_hit), ordonnés par bougie cible
+        self.samples = deque()
+        self.targets = set()
+        self.abs_error_sum = 0.0
+        self.direction_hits = 0
+        self.signals = 0
+        self.signal_hits = 0
+        self.resolved_total = 0
+
+    def add(self, target_time_ms: int, abs_error: float, direction_hit: bool, signal_hit: Optional[bool]) -> bool:
+        """Ajouter une bougie cible résolue ; False si elle est déjà dans la fenêtre"""
+        if target_time_ms in self.targets:
+            return False
+        self.samples.append((target_time_ms, abs_error, direction_hit, signal_hit))
+        self.targets.add(target_time_ms)
+        self._apply(abs_error, direction_hit, signal_hit, 1)
+        self.resolved_total += 1
+        if len(self.samples) > self.window:
+            target, *sample = self.samples.popleft()
+            self.targets.discard(target)
+            self._apply(*sample, -1)
+        return True
+
+    def _apply(self, abs_error: float, direction_hit: bool, signal_hit: Optional[bool], sign: int):
+        self.abs_error_sum += sign * abs_error
+        self.direction_hits += sign * int(direction_hit)
+        if signal_hit is not None:
+            self.signals += sign
+            self.signal_hits += sign * int(signal_hit)
+
+    def merge(self, samples: List[tuple], resolved_total: int):
+        """
+        Fusionner la fenêtre d'un autre processus (union par bougie cible).
+
+        resolved_total devient celui de l'autre état plus les bougies résolues
+        ici seulement.
+        """
+        other = {sample[0]: sample for sample in samples}
+        own_only = [sample for sample in self.samples if sample[0] not in other]
+        merged = sorted([*other.values(), *own_only])[-self.window:]
+        total = resolved_total + len(own_only)
+
+        self._reset()
+        for sample in merged:
+            self.add(*sample)
+        self.resolved_total = total
+
+    def snapshot(self) -> Dict:
+        n = len(self.samples)
+        return {
+            'samples': n,
+            'resolved_total': self.resolved_total,
+            'mae': self.abs_error_sum / n if n else None,
+            'directional_accuracy': self.direction_hits / n if n else None,
+            'signal_hit_rate': self.signal_hits / self.signals if self.signals else None,
+            'signals': self.signals,
+        }
+
+
+class OnlineAccuracyTracker:
+    """Jointure prédiction → clôture réalisée et précision glissante par (symbole, version)"""
+
+    def __init__(self, metrics, window: int = 168, state_file: Optional[str] = None):
+        self.metrics = metrics
+        self.window = window
+        self.state_file = state_file
+        self.pending: Dict[str, deque] = {}
+        self.stats: Dict[tuple, RollingAccuracy] = {}
+
+        self.metrics.describe('predictor_accuracy_mae', "MAE glissante des prédictions résolues ($)")
+        self.metrics.describe('predictor_accuracy_directional', "Précision directionnelle glissante (0-1)")
+        self.metrics.describe('predictor_accuracy_signal_hit_rate', "Taux de réussite glissant des signaux BUY/SELL (0-1)")
+        self.metrics.describe('predictor_accuracy_resolved_total', "Bougies cibles jointes à leur clôture réalisée")
+        self.metrics.describe('predictor_accuracy_pending', "Bougies cibles en attente de clôture")
+
+    def record(self, symbol: str, model_version: str, target_time_ms: int,
+               current_price: float, predicted_price: float, signal: str):
+        """
+        Mettre en attente la prédiction de la clôture de la bougie ouverte à target_time_ms.
+
+        Une attente existante pour la même bougie et la même version est remplacée.
+        """
+        pending = self.pending.setdefault(symbol, deque(maxlen=MAX_PENDING))
+        target_time_ms = int(target_time_ms)
+        entry = (target_time_ms, model_version, float(current_price), float(predicted_price), signal)
+        # Attentes ordonnées par bougie cible : une attente de même cible est en fin de file
+        replaced = False
+        for i in reversed(range(len(pending))):
+            if pending[i][0] < target_time_ms:
+                break
+            if pending[i][:2] == entry[:2]:
+                pending[i] = entry
+                replaced = True
+                break
+        if not replaced:
+            pending.append(entry)
+        self.metrics.set_gauge('predictor_accuracy_pending', len(pending), symbol=symbol)
+
+    def resolve(self, symbol: str, dates_ms: np.ndarray, closes: np.ndarray) -> int:
+        """
+        Résoudre les prédictions dont la bougie cible est fermée.
+
+        Une bougie est fermée dès qu'une bougie plus récente existe. Les attentes
+        sont ordonnées par bougie cible : on ne dépile que par la gauche.
+        Sans trade pendant l'heure cible, la dernière clôture connue est retenue.
+        """
+        pending = self.pending.get(symbol)
+        if not pending or len(dates_ms) == 0:
+            return 0
+
+        resolved = 0
+        last_open = dates_ms[-1]
+        while pending and pending[0][0] < last_open:
+            target, version, current, predicted, signal = pending.popleft()
+            idx = int(np.searchsorted(dates_ms, target, side='right')) - 1
+            if idx < 0:
+                continue
+            realized = float(closes[idx])
+            realized_move = np.sign(realized - current)
+            signal_hit = None
+            if signal in BUY_SIGNALS:
+                signal_hit = realized_move > 0
+            elif signal in SELL_SIGNALS:
+                signal_hit = realized_move < 0
+
+            key = (symbol, version)
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = RollingAccuracy(self.window)
+            added = stats.add(target, abs(predicted - realized), bool(np.sign(predicted - current) == realized_move),
+                              None if signal_hit is None else bool(signal_hit))
+            if added:
+                self.metrics.inc('predictor_accuracy_resolved_total', symbol=symbol, model_version=version)
+                resolved += 1
+
+        self.metrics.set_gauge('predictor_accuracy_pending', len(pending), symbol=symbol)
+        if resolved:
+            self._publish(symbol)
+        return resolved
+
+    def _publish(self, symbol: str):
+        for (stats_symbol, version), stats in self.stats.items():
+            if stats_symbol != symbol:
+                continue
+            snapshot = stats.snapshot()
+            gauges = {
+                'predictor_accuracy_mae': snapshot['mae'],
+                'predictor_accuracy_directional': snapshot['directional_accuracy'],
+                'predictor_accuracy_signal_hit_rate': snapshot['signal_hit_rate'],
+            }
+            for name, value in gauges.items():
+                if value is not None:
+                    self.metrics.set_gauge(name, value, symbol=symbol, model_version=version)
+
+    def snapshot(self, symbol: str, model_version: str) -> Dict:
+        stats = self.stats.get((symbol, model_version))
+        return stats.snapshot() if stats is not None else RollingAccuracy(self.window).snapshot()
+
+    # ------------------------------------------------------------------ persistance
+
+    def save(self):
+        """
+        Fusionner l'état sur disque (autres processus) puis l'écrire atomiquement.
+
+        Le verrou (fichier .lock) sérialise lecture-fusion-écriture entre processus.
+        """
+        if not self.state_file:
+            return
+        os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+        with open(self.state_file + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._merge(self._read_state() or {})
+            state = {
+                'window': self.window,
+                'pending': {symbol: list(pending) for symbol, pending in self.pending.items()},
+                'stats': [
+                    {'symbol': symbol, 'model_version': version, 'resolved_total': stats.resolved_total,
+                     'samples': list(stats.samples)}
+                    for (symbol, version), stats in self.stats.items()
+                ],
+            }
+            with open(self.state_file + '.tmp', 'w') as f:
+                json.dump(state, f)
+            os.replace(self.state_file + '.tmp', self.state_file)
+
+    def load(self) -> bool:
+        """Recharger l'état persisté ; False s'il n'existe pas ou est illisible"""
+        if not self.state_file:
+            return False
+        state = self._read_state()
+        if state is None:
+            return False
+        self._merge(state)
+        for symbol in {symbol for symbol, _ in self.stats}:
+            self._publish(symbol)
+        return True
+
+    def _read_state(self) -> Optional[Dict]:
+        try:
+            with open(self.state_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _merge(self, state: Dict):
+        """Union de l'état en mémoire et d'un état persisté, par bougie cible"""
+        for entry in state.get('stats', []):
+            key = (entry['symbol'], entry['model_version'])
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = RollingAccuracy(self.window)
+            # Échantillons sans bougie cible (format antérieur) : ignorés
+            stats.merge([tuple(sample) for sample in entry['samples'] if len(sample) == 4], entry['resolved_total'])
+
+        for symbol, items in state.get('pending', {}).items():
+            merged = {(item[0], item[1]): tuple(item) for item in items}
+            merged.update({(item[0], item[1]): item for item in self.pending.get(symbol, ())})
+            # Attentes déjà résolues par un autre processus
+            kept = [item for key, item in sorted(merged.items())
+                    if key[0] not in getattr(self.stats.get((symbol, key[1])), 'targets', ())]
+            self.pending[symbol] = deque(kept, maxlen=MAX_PENDING)
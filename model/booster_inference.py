@@ -0,0 +1,90 @@
+"""
+Inférence XGBoost sans XGBoost
+==============================
+
+Évalue un modèle XGBoost sauvegardé au format JSON (`booster.save_model('model.json')`)
+avec NumPy uniquement. L'import de xgboost charge aussi pandas, scipy et
+scikit-learn (plus d'une seconde au démarrage) ; ce module permet au mode
+inférence seule de répondre en quelques dizaines de millisecondes.
+
+Limites: arbres numériques uniquement (pas de features catégorielles), booster
+gbtree, objectif de régression (sortie = base_score + somme des feuilles).
+"""
+
+import json
+from typing import List
+
+import numpy as np
+
+
+def _parse_float_list(value) -> List[float]:
+    """base_score est une chaîne '5E-1' (xgboost < 3) ou '[5E-1,...]' (xgboost >= 3)"""
+    if isinstance(value, (int, float)):
+        return [float(value)]
+    return [float(v) for v in str(value).strip('[]').split(',') if v.strip()]
+
+
+class NumpyBooster:
+    """Modèle XGBoost (gbtree) chargé depuis son export JSON"""
+
+    def __init__(self, model_json: dict):
+        learner = model_json['learner']
+        params = learner['learner_model_param']
+        booster = learner['gradient_booster']
+        if booster.get('name') != 'gbtree':
+            raise ValueError(f"Booster non supporté: {booster.get('name')}")
+
+        model = booster['model']
+        self.num_target = max(1, int(params.get('num_target', 1)))
+        base_score = _parse_float_list(params['base_score'])
+        self.base_score = np.resize(np.array(base_score, dtype=np.float64), self.num_target)
+
+        # Early stopping : ne garder que les itérations jusqu'à best_iteration (comme XGBRegressor.predict)
+        n_trees = len(model['trees'])
+        best_iteration = learner.get('attributes', {}).get('best_iteration')
+        if best_iteration is not None:
+            indptr = model.get('iteration_indptr')
+            n_trees = indptr[int(best_iteration) + 1] if indptr else (int(best_iteration) + 1) * self.num_target
+
+        self.trees = []
+        for tree, target in zip(model['trees'][:n_trees], model['tree_info'][:n_trees]):
+            self.trees.append((
+                int(target),
+                np.asarray(tree['left_children'], dtype=np.int32),
+                np.asarray(tree['right_children'], dtype=np.int32),
+                np.asarray(tree['split_indices'], dtype=np.int32),
+                np.asarray(tree['split_conditions'], dtype=np.float32),
+                np.asarray(tree['split_conditions'], dtype=np.float64),
+                np.asarray(tree['default_left'], dtype=bool),
+            ))
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyBooster':
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Prédire pour une matrice (n, n_features).
+
+        Retourne un vecteur (n,) pour un modèle à une sortie, sinon (n, num_target).
+        Chaque arbre est parcouru niveau par niveau, vectorisé sur les lignes.
+        """
+        # XGBoost compare les features en float32
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        rows = np.arange(len(X))
+        out = np.tile(self.base_score, (len(X), 1))
+
+        for target, left, right, split_index, threshold, leaf_value, default_left in self.trees:
+            node = np.zeros(len(X), dtype=np.int32)
+            active = left[node] != -1
+            while active.any():
+                idx = node[active]
+                values = X[rows[active], split_index[idx]]
+                go_left = np.where(np.isnan(values), default_left[idx], values < threshold[idx])
+                node[active] = np.where(go_left, left[idx], right[idx])
+                active = left[node] != -1
+            # Pour une feuille, split_conditions contient la valeur de la feuille
+            out[:, target] += leaf_value[node]
+
+        return out[:, 0] if self.num_target == 1 else out
@@ -31,6 +31,9 @@ class ElkRealtimeConfig:
             # 📊 Configuration des données Binance
             "index_pattern": "binance-trades-*",   # Pattern des index Elasticsearch
             "symbol": "BTCUSDT",                   # Symbole crypto à analyser
+            "symbols": ["BTCUSDT", "ETHUSDT",      # Symboles récupérés en une requête
+                        "SOLUSDT", "BNBUSDT"],     # (get_latest_candles)
+            "forecast_horizon_hours": 24,          # Trajectoire récursive stockée avec chaque prédiction
             
             # 🔍 Paramètres de requête
             "default_lookback_hours": 48,          # Heures de données à récupérer
@@ -57,6 +60,17 @@ class ElkRealtimeConfig:
                 "default_max_predictions": 10,     # Nombre max de prédictions continues
                 "save_predictions": True,           # Sauvegarder l'historique
                 "log_level": "INFO"                # Niveau de logging
+            },
+            
+            # 🛡️ Client Elasticsearch (pool, timeouts, retries, circuit breaker)
+            "es_client": {
+                "connections_per_node": 8,         # Connexions HTTP par nœud
+                "search_timeout_seconds": 15,      # Timeout d'une recherche
+                "index_timeout_seconds": 5,        # Timeout d'une écriture
+                "max_retries": 2,                  # Retries sur erreurs transitoires
+                "hedge_after_seconds": 2.0,        # Lecture doublée si pas de réponse (null: désactivé)
+                "failure_threshold": 3,            # Échecs consécutifs avant ouverture du circuit
+                "reset_timeout_seconds": 30        # Durée d'ouverture avant un appel d'essai
             }
         }
     
@@ -0,0 +1,263 @@
+"""
+Client Elasticsearch résilient du service de prédiction
+=======================================================
+
+Couche commune aux chemins de lecture (agrégations OHLCV) et d'écriture
+(index binance-predictions-*), pour que la durée d'un cycle reste bornée
+même quand Elasticsearch est lent ou indisponible :
+
+- Pool de connexions dimensionné (connections_per_node) et timeout par requête
+- Retries bornés avec backoff exponentiel + jitter, uniquement sur les erreurs
+  transitoires (connexion, timeout, 429/502/503/504)
+- Lectures « hedgées » optionnelles : si la requête n'a pas répondu après
+  hedge_after_seconds, une seconde requête identique part sur une autre
+  connexion du pool et la première réponse l'emporte
+- Circuit breaker : après failure_threshold échecs consécutifs, les appels
+  échouent immédiatement (CircuitOpenError) pendant reset_timeout_seconds,
+  l'appelant servant alors son cache local ; un seul appel d'essai ensuite
+
+Pire cas d'un appel (worst_case_seconds) : (max_retries + 1) × tentative + somme
+des backoffs, une tentative durant au plus timeout, ou hedge_after_seconds + timeout
+pour une lecture hedgée (le double part après le délai et dispose d'un timeout
+complet). Avec la configuration du déploiement (15 s, hedge 2 s, 2 retries) :
+3 × 17 s + 0.75 s ≈ 52 s pour une recherche.
+
+Les erreurs de sérialisation (corps de requête ou réponse non (dé)codable) ne
+sont pas retentées : un nouvel essai produirait la même erreur.
+
+Utilisation:
+    es = ResilientESClient(config, metrics, logger)
+    response = es.search(index='binance-trades-*', body=query, hedge=True)
+"""
+
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
+from typing import Dict, List, Optional
+
+from elasticsearch import Elasticsearch, ApiError, SerializationError, TransportError
+
+# Réglages par défaut, surchargeables par la section "es_client" de elk_config.json
+DEFAULT_SETTINGS = {
+    'connections_per_node': 8,
+    'request_timeout_seconds': 10.0,
+    'search_timeout_seconds': 15.0,
+    'index_timeout_seconds': 5.0,
+    'max_retries': 2,
+    'backoff_base_seconds': 0.25,
+    'backoff_max_seconds': 2.0,
+    'hedge_after_seconds': None,
+    'failure_threshold': 3,
+    'reset_timeout_seconds': 30.0,
+}
+
+RETRYABLE_STATUS = (429, 502, 503, 504)
+
+# États du circuit (valeur de la jauge predictor_es_circuit_state)
+CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+STATE_NAMES = {CLOSED: 'fermé', HALF_OPEN: 'semi-ouvert', OPEN: 'ouvert'}
+
+
+class CircuitOpenError(Exception):
+    """Appel refusé sans contacter Elasticsearch : le circuit est ouvert"""
+
+
+class CircuitBreaker:
+    """Circuit breaker à échecs consécutifs (fermé → ouvert → semi-ouvert → fermé)"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True si un appel peut partir (en semi-ouvert : un seul appel d'essai à la fois)"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def release(self):
+        """Fin d'un appel sans information sur la santé du cluster (état inchangé)"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def retry_in(self) -> float:
+        """Secondes avant le prochain appel d'essai"""
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+
+def is_retryable(error: Exception) -> bool:
+    """Erreurs transitoires : connexion/timeout, surcharge ou indisponibilité du cluster"""
+    if isinstance(error, ApiError):
+        return error.meta.status in RETRYABLE_STATUS
+    # SerializationError dérive de TransportError mais est déterministe
+    return isinstance(error, TransportError) and not isinstance(error, SerializationError)
+
+
+class ResilientESClient:
+    """Client Elasticsearch partagé : pool, timeouts, retries, hedging et circuit breaker"""
+
+    def __init__(self, config: Dict, metrics, logger):
+        self.settings = {**DEFAULT_SETTINGS, **config.get('es_client', {})}
+        self.metrics = metrics
+        self.logger = logger
+        self.breaker = CircuitBreaker(self.settings['failure_threshold'], self.settings['reset_timeout_seconds'])
+
+        # Les retries du transport sont désactivés : ils sont faits ici, avec backoff et breaker
+        self.client = Elasticsearch(
+            [f"{'https' if config['use_ssl'] else 'http'}://{config['host']}:{config['port']}"],
+            basic_auth=(config['user'], config['password']),
+            verify_certs=config['verify_certs'],
+            connections_per_node=self.settings['connections_per_node'],
+            request_timeout=self.settings['request_timeout_seconds'],
+            max_retries=0,
+            retry_on_timeout=False,
+        )
+        self._hedge_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='es-hedge')
+
+        self.metrics.describe('predictor_es_requests_total', "Requêtes Elasticsearch par opération et résultat")
+        self.metrics.describe('predictor_es_request_seconds', "Durée des appels Elasticsearch (retries compris)")
+        self.metrics.describe('predictor_es_hedged_requests_total', "Lectures doublées après hedge_after_seconds")
+        self.metrics.describe('predictor_es_circuit_state', "État du circuit breaker (0 fermé, 1 semi-ouvert, 2 ouvert)")
+        self.metrics.set_gauge('predictor_es_circuit_state', CLOSED)
+        self.logger.info(
+            f"⏱️ ES pire cas par appel: search {self.worst_case_seconds('search', hedge=True):.1f}s | "
+            f"index {self.worst_case_seconds('index'):.1f}s"
+        )
+
+    # ------------------------------------------------------------------ API
+
+    def info(self) -> Dict:
+        return self._call('info', lambda: self.client.options(
+            request_timeout=self.settings['request_timeout_seconds']).info())
+
+    def search(self, index: str, body: Dict, hedge: bool = False) -> Dict:
+        """Recherche bornée ; avec hedge=True et hedge_after_seconds défini, lecture doublée"""
+        timeout = self.settings['search_timeout_seconds']
+        request = lambda: self.client.options(request_timeout=timeout).search(index=index, body=body)
+        if hedge and self.settings['hedge_after_seconds']:
+            return self._call('search', lambda: self._hedged(request))
+        return self._call('search', request)
+
+    def index(self, index: str, body: Dict) -> Dict:
+        return self._call('index', lambda: self.client.options(
+            request_timeout=self.settings['index_timeout_seconds']).index(index=index, document=body))
+
+    def bulk_index(self, index: str, documents: List[Dict]) -> Dict:
+        """Indexer plusieurs documents en un aller-retour"""
+        operations = []
+        for document in documents:
+            operations.append({'index': {'_index': index}})
+            operations.append(document)
+        return self._call('bulk', lambda: self.client.options(
+            request_timeout=self.settings['index_timeout_seconds']).bulk(operations=operations))
+
+    def worst_case_seconds(self, operation: str = 'search', hedge: bool = False) -> float:
+        """Durée maximale d'un appel : tentatives au timeout (+ délai de hedge), backoffs maximaux"""
+        timeout = self.settings[{'search': 'search_timeout_seconds', 'index': 'index_timeout_seconds',
+                                 'bulk': 'index_timeout_seconds'}.get(operation, 'request_timeout_seconds')]
+        if hedge and operation == 'search' and self.settings['hedge_after_seconds']:
+            timeout += self.settings['hedge_after_seconds']
+        retries = self.settings['max_retries']
+        backoffs = sum(min(self.settings['backoff_max_seconds'], self.settings['backoff_base_seconds'] * 2 ** attempt)
+                       for attempt in range(retries))
+        return (retries + 1) * timeout + backoffs
+    
+    @property
+    def degraded(self) -> bool:
+        return self.breaker.state != CLOSED
+
+    # ------------------------------------------------------------------ mécanique
+
+    def _call(self, operation: str, request):
+        """Exécuter une requête avec retries, backoff et circuit breaker"""
+        if not self.breaker.allow():
+            self.metrics.inc('predictor_es_requests_total', operation=operation, outcome='circuit_open')
+            raise CircuitOpenError(
+                f"Circuit Elasticsearch ouvert (prochain essai dans {self.breaker.retry_in():.0f}s)"
+            )
+
+        start = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    response = request()
+                except Exception as e:
+                    if not is_retryable(e):
+                        if isinstance(e, SerializationError):
+                            # Erreur locale d'encodage/décodage : ne dit rien de la santé du cluster
+                            self.breaker.release()
+                        else:
+                            # Erreur de requête (4xx) : le cluster répond, le circuit reste fermé
+                            self.breaker.record_success()
+                        self.metrics.inc('predictor_es_requests_total', operation=operation, outcome='error')
+                        raise
+                    if attempt >= self.settings['max_retries'] or self.breaker.state == HALF_OPEN:
+                        self._record_failure(operation, e)
+                        raise
+                    delay = min(self.settings['backoff_max_seconds'],
+                                self.settings['backoff_base_seconds'] * 2 ** attempt)
+                    delay *= random.uniform(0.5, 1.0)
+                    attempt += 1
+                    self.metrics.inc('predictor_es_requests_total', operation=operation, outcome='retry')
+                    self.logger.warning(f"⚠️ ES {operation} échoué ({type(e).__name__}), retry {attempt} dans {delay:.2f}s")
+                    time.sleep(delay)
+                    continue
+                self.breaker.record_success()
+                self.metrics.inc('predictor_es_requests_total', operation=operation, outcome='success')
+                return response
+        finally:
+            self.metrics.set_gauge('predictor_es_circuit_state', self.breaker.state)
+            self.metrics.observe('predictor_es_request_seconds', time.perf_counter() - start, operation=operation)
+
+    def _record_failure(self, operation: str, error: Exception):
+        previous = self.breaker.state
+        self.breaker.record_failure()
+        self.metrics.inc('predictor_es_requests_total', operation=operation, outcome='failure')
+        if self.breaker.state == OPEN and previous != OPEN:
+            self.logger.error(
+                f"🔌 Circuit Elasticsearch {STATE_NAMES[OPEN]} après {self.breaker.failures} échec(s) "
+                f"({type(error).__name__}) : cache local pendant {self.breaker.reset_timeout:.0f}s"
+            )
+
+    def _hedged(self, request):
+        """Première réponse réussie entre la requête et son double lancé après hedge_after_seconds"""
+        futures = [self._hedge_pool.submit(request)]
+        done, _ = wait(futures, timeout=self.settings['hedge_after_seconds'], return_when=FIRST_COMPLETED)
+        if not done:
+            futures.append(self._hedge_pool.submit(request))
+            self.metrics.inc('predictor_es_hedged_requests_total')
+
+        error: Optional[Exception] = None
+        for future in as_completed(futures):
+            try:
+                return future.result()
+            except Exception as e:
+                error = e
+        raise error
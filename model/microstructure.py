@@ -0,0 +1,136 @@
+"""
+Features de microstructure par bougie du modèle
+===============================================
+
+binance-backend calcule la microstructure de chaque bougie courte (1 min) à
+l'ingestion et la publie dans le ring buffer mmap des bougies. Ce module la
+ré-agrège par bougie du modèle (1 h) en NumPy, sans requête Elasticsearch :
+les sommes brutes du ring (volumes, tranches de taille, moyenne/M2 des temps
+inter-trades) rendent l'agrégation exacte.
+
+Les heures non couvertes par le ring valent NaN (valeur manquante pour XGBoost).
+
+Utilisation:
+    extra = load_microstructure('BTCUSDT', hour_starts_ms)   # (n_heures, len(MICRO_FEATURES)) ou None
+"""
+
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from tick_ring_reader import RING_DIR, TickRingReader
+
+MICRO_FEATURES = (
+    'order_flow_imbalance',
+    'buy_volume',
+    'sell_volume',
+    'vwap_deviation',
+    'size_share_small',
+    'size_share_medium',
+    'size_share_large',
+    'size_share_whale',
+    'inter_trade_mean_ms',
+    'inter_trade_std_ms',
+    'inter_trade_max_ms',
+)
+
+# Slots laissés à l'écrivain pendant une copie du ring : au-delà de RING_READ_MARGIN - 1
+# bougies publiées entre latest() et la fin de la copie, elle est relue
+RING_READ_MARGIN = 64
+
+
+def hourly_microstructure(candles: np.ndarray, starts_ms: np.ndarray, interval_ms: int = 3600 * 1000) -> np.ndarray:
+    """
+    Agréger les bougies du ring (ordre chronologique) par intervalle du modèle.
+
+    Args:
+        candles: enregistrements CANDLE_DTYPE
+        starts_ms: début (ms epoch, trié) de chaque bougie du modèle
+        interval_ms: durée d'une bougie du modèle
+
+    Returns:
+        Tableau (len(starts_ms), len(MICRO_FEATURES)), NaN sans donnée
+    """
+    n = len(starts_ms)
+    out = np.full((n, len(MICRO_FEATURES)), np.nan)
+    if n == 0 or len(candles) == 0:
+        return out
+
+    bucket_start = candles['open_time'] // interval_ms * interval_ms
+    idx = np.searchsorted(starts_ms, bucket_start)
+    valid = idx < n
+    valid[valid] = starts_ms[idx[valid]] == bucket_start[valid]
+    candles, idx = candles[valid], idx[valid]
+    if len(candles) == 0:
+        return out
+
+    def total(values):
+        return np.bincount(idx, weights=values, minlength=n)
+
+    buy = total(candles['buy_volume'])
+    sell = total(candles['sell_volume'])
+    quote = total(candles['quote_volume'])
+    volume = buy + sell
+    sizes = np.stack([total(candles['size_counts'][:, k]) for k in range(candles['size_counts'].shape[1])], axis=1)
+    trades = sizes.sum(axis=1)
+
+    # Clôture de l'intervalle : celle de la dernière bougie courte qu'il contient
+    last = np.full(n, -1)
+    np.maximum.at(last, idx, np.arange(len(candles)))
+    has = last >= 0
+    close = np.where(has, candles['close'][np.maximum(last, 0)], np.nan)
+
+    # Fusion des moyennes/M2 de Welford (formule parallèle)
+    gaps = np.maximum(candles['trade_count'] - 1, 0).astype(np.float64)
+    gap_count = total(gaps)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        gap_mean = total(gaps * candles['gap_mean_ms']) / gap_count
+        gap_m2 = total(candles['gap_m2']) + total(gaps * (candles['gap_mean_ms'] - gap_mean[idx]) ** 2)
+        gap_std = np.sqrt(gap_m2 / gap_count)
+        gap_max = np.full(n, -np.inf)
+        np.maximum.at(gap_max, idx, candles['gap_max_ms'])
+
+        columns = [
+            (buy - sell) / volume,
+            buy,
+            sell,
+            (quote / volume) / close - 1,
+            *(sizes / trades[:, None]).T,
+            gap_mean,
+            gap_std,
+            np.where(gap_count > 0, gap_max, np.nan),
+        ]
+    out[has] = np.column_stack(columns)[has]
+    return out
+
+
+def stable_copy(reader: TickRingReader, n: int) -> Tuple[np.ndarray, int]:
+    """
+    Copie des n derniers enregistrements du ring, relue si l'écrivain les a
+    réécrits entre-temps. Retourne (copie, write_seq de la lecture).
+    """
+    n = min(n, max(1, reader.capacity - RING_READ_MARGIN))
+    while True:
+        view, seq = reader.latest(n)
+        records = view.copy()
+        if reader.still_valid(seq, len(records)):
+            return records, seq
+
+
+def load_microstructure(symbol: str, starts_ms: np.ndarray, interval_ms: int = 3600 * 1000,
+                        ring_dir: str = RING_DIR) -> Optional[np.ndarray]:
+    """
+    Microstructure par bougie du modèle, lue dans le ring des bougies du symbole.
+
+    Retourne None si le ring n'existe pas (backend absent ou autre machine).
+    """
+    path = os.path.join(ring_dir, f"{symbol.lower()}.candles.ring")
+    if not os.path.exists(path):
+        return None
+    reader = TickRingReader.for_symbol(symbol, 'candles', ring_dir)
+    try:
+        candles, _ = stable_copy(reader, reader.capacity)
+    finally:
+        reader.close()
+    return hourly_microstructure(candles, np.asarray(starts_ms, dtype=np.int64), interval_ms)
@@ -13,32 +13,87 @@ Features:
 - Mode continu avec intervalle configurable
 - Logs détaillés et métriques
 - Sauvegarde des prédictions
+- Timings par étape (fetch, features, entraînement, inférence, écriture) et profiling
+- Mode inférence seule (modèle, scaler et bougies persistés) à démarrage rapide
+- Mode streaming : prédiction à chaque trade (voir streaming_predictor.py)
+- Trace de latence de bout en bout (Binance → backend → Logstash → ES → prédiction)
+- Client ES résilient (timeouts, retries, circuit breaker) avec repli sur le cache local
+- Précision en ligne : chaque prédiction est jointe à la clôture réalisée (voir accuracy_tracker.py)
+- Features de microstructure calculées à l'ingestion, lues dans le ring mmap (voir microstructure.py)
+- Trajectoire récursive sur N heures, vectorisée et groupée par symbole (forecast_paths) ;
+  chaque symbole de config 'symbols' a son document de prédiction (predict_symbols)
+- Intervalle de prédiction 10-90 % d'un seul modèle multi-quantiles, calibré sur la validation,
+  qui pondère le signal de trading
 
 Utilisation:
     python realtime_prediction_service.py
     python realtime_prediction_service.py --interval 30 --predictions 10
+    python realtime_prediction_service.py --metrics-port 8080 --profile
+    python realtime_prediction_service.py --single --inference-only
+    python realtime_prediction_service.py --stream --metrics-port 8080
 """
 
+from __future__ import annotations
+
 import os
 import sys
 import json
 import time
 import argparse
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 import warnings
 warnings.filterwarnings('ignore')
 
-import pandas as pd
-import numpy as np
-from elasticsearch import Elasticsearch
-from elasticsearch.helpers import scan
-import xgboost as xgb
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.metrics import mean_absolute_error, mean_squared_error
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from service_metrics import MetricsRegistry, start_metrics_server
+
+# Les dépendances lourdes (pandas, scikit-learn, XGBoost, client ES) sont importées
+# à la demande dans chaque chemin de code : --test-connection et --inference-only
+# ne paient pas leur temps d'import.
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import xgboost as xgb
+
+# Fichiers persistés pour le mode inférence seule
+MODEL_FILE = 'model.json'
+META_FILE = 'model_meta.json'
+CANDLES_FILE = 'candles.json'
+CACHED_CANDLES = 200
+ACCURACY_STATE_FILE = 'accuracy_state.json'
+
+# Version du modèle (features + objectif), clé du suivi de précision en ligne
+MODEL_VERSION = 'xgb-close-q10-50-90-lb10-v2'
+MICRO_MODEL_VERSION = 'xgb-close-micro-q10-50-90-lb10-v2'
+# Quantiles prédits par un seul modèle (objectif reg:quantileerror) : bornes de l'intervalle et médiane
+QUANTILES = (0.1, 0.5, 0.9)
+# Probabilité de la direction prédite en dessous de laquelle le signal reste HOLD ;
+# un signal fort exige tout l'intervalle du même côté que la médiane
+MIN_SIGNAL_CONFIDENCE = 0.6
+STRONG_SIGNAL_CONFIDENCE = QUANTILES[-1]
+# Horizon de prédiction : clôture de la bougie horaire suivante
+CANDLE_INTERVAL_MS = 3600 * 1000
+
+# Trajectoire récursive : heures prédites par défaut, et fenêtre de prix qui
+# détermine entièrement une ligne de features (MACD sur 26 bougies)
+FORECAST_HORIZON_HOURS = 24
+FORECAST_WINDOW = 26
+# Horizon du mode inférence seule : chaque pas est un parcours NumPy de tous les
+# arbres (~10 ms), 24 pas annuleraient le démarrage rapide
+INFERENCE_FORECAST_HORIZON_HOURS = 1
+
+# Prédictions en attente d'écriture pendant une indisponibilité d'Elasticsearch
+MAX_PENDING_PREDICTIONS = 500
+
+# Trace de latence : fenêtre des trades récents utilisés pour la moyenne par étape
+TRACE_WINDOW = '5m'
+# Buckets (secondes) des histogrammes de fraîcheur et de latence par étape : 1 ms à 1 h
+TRACE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
 
 class ElkRealtimePredictor:
     """Service de prédiction temps réel connecté à votre stack ELK-K3s"""
@@ -51,11 +106,36 @@ class ElkRealtimePredictor:
             config_file: Fichier de configuration ELK
         """
         self.config = self._load_config(config_file)
+        self._validate_config(self.config)
         self.es_client = None
         self.connected = False
-        self.scaler = MinMaxScaler(feature_range=(0, 1))
+        self.scaler = None
         self.last_model = None
+        self.model_version = MODEL_VERSION
+        # Calibration de l'intervalle (unités normalisées) et couverture mesurée sur le test
+        self.interval_adjustment = 0.0
+        self.interval_coverage = None
         self.predictions_history = []
+        self.metrics = MetricsRegistry()
+        self.metrics.describe('predictor_stage_duration_seconds', "Durée de chaque étape d'un cycle de prédiction")
+        self.metrics.describe('predictor_cycle_duration_seconds', "Durée totale d'un cycle de prédiction")
+        self.metrics.describe('predictor_trace_hop_seconds', "Latence moyenne par étape du pipeline (trades récents)")
+        self.metrics.describe('predictor_data_freshness_seconds', "Âge du dernier trade utilisé au moment de la prédiction")
+        self.stage_timings = {}
+        # Trace de latence par symbole, mesurée au dernier fetch
+        self.latency_traces = {}
+        self.data_source = 'elasticsearch'
+        self.candles_cache = {}
+        self.pending_predictions = deque(maxlen=MAX_PENDING_PREDICTIONS)
+        self.profile_dir = None
+        
+        from accuracy_tracker import OnlineAccuracyTracker
+        self.accuracy = OnlineAccuracyTracker(
+            self.metrics,
+            window=self.config.get('accuracy_window', 168),
+            state_file=os.path.join(self.config.get('artifacts_dir', 'artifacts'), ACCURACY_STATE_FILE)
+        )
+        self.accuracy.load()
         
         # Configuration des logs
         logging.basicConfig(
@@ -83,7 +163,11 @@ class ElkRealtimePredictor:
                 'index_pattern': 'binance-trades-*',
                 'symbol': 'BTCUSDT',
                 'use_ssl': False,
-                'verify_certs': False
+                'verify_certs': False,
+                'artifacts_dir': 'artifacts',
+                'use_microstructure': True,
+                'forecast_horizon_hours': FORECAST_HORIZON_HOURS,
+                'inference_forecast_horizon_hours': INFERENCE_FORECAST_HORIZON_HOURS
             }
             
             # Override avec les variables d'environnement si disponibles (pour Kubernetes)
@@ -92,6 +176,7 @@ class ElkRealtimePredictor:
                 'port': int(os.getenv('ELK_PORT', 9200)),
                 'user': os.getenv('ELK_USER'),
                 'password': os.getenv('ELK_PASSWORD'),
+                'artifacts_dir': os.getenv('MODEL_ARTIFACTS_DIR'),
             }
             
             for key, value in env_overrides.items():
@@ -133,6 +218,57 @@ class ElkRealtimePredictor:
             self.logger.error(f"❌ Erreur lecture configuration: {e}")
             sys.exit(1)
     
+    @staticmethod
+    def _validate_config(config: Dict):
+        """Horizons de trajectoire (défauts si absents) : au moins une heure"""
+        for key, default in (('forecast_horizon_hours', FORECAST_HORIZON_HOURS),
+                             ('inference_forecast_horizon_hours', INFERENCE_FORECAST_HORIZON_HOURS)):
+            horizon = int(config.setdefault(key, default))
+            if horizon < 1:
+                raise ValueError(f"Configuration invalide: {key} = {horizon} (au moins 1 heure)")
+            config[key] = horizon
+    
+    @contextmanager
+    def _stage(self, name: str):
+        """Chronométrer une étape du cycle (cumulée si l'étape est appelée plusieurs fois)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stage_timings[name] = self.stage_timings.get(name, 0.0) + elapsed * 1000
+            self.metrics.observe('predictor_stage_duration_seconds', elapsed, stage=name)
+
+    @contextmanager
+    def _profile_cycle(self, cycle: int):
+        """Profiler un cycle (cProfile + snapshot tracemalloc) si --profile est actif"""
+        if self.profile_dir is None:
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            prefix = os.path.join(self.profile_dir, f"cycle_{cycle:04d}")
+            profiler.dump_stats(f"{prefix}.prof")
+            snapshot.dump(f"{prefix}.tracemalloc")
+            current, peak = tracemalloc.get_traced_memory()
+            self.logger.info(f"🔬 Profil cycle #{cycle}: {prefix}.prof | mémoire {current / 1e6:.1f} Mo (pic {peak / 1e6:.1f} Mo)")
+            for stat in snapshot.statistics('lineno')[:3]:
+                self.logger.info(f"   {stat}")
+            tracemalloc.reset_peak()
+
+    def enable_profiling(self, profile_dir: str):
+        """Activer le profiling par cycle (fichiers .prof et .tracemalloc dans profile_dir)"""
+        os.makedirs(profile_dir, exist_ok=True)
+        self.profile_dir = profile_dir
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        self.logger.info(f"🔬 Profiling activé → {profile_dir}")
+
     def connect_elasticsearch(self) -> bool:
         """Établir la connexion avec votre cluster Elasticsearch"""
         try:
@@ -141,11 +277,12 @@ class ElkRealtimePredictor:
             self.logger.info(f"   User: {self.config['user']}")
             self.logger.info(f"   Index: {self.config['index_pattern']}")
             
-            self.es_client = Elasticsearch(
-                [f"{'https' if self.config['use_ssl'] else 'http'}://{self.config['host']}:{self.config['port']}"],
-                basic_auth=(self.config['user'], self.config['password']),
-                verify_certs=self.config['verify_certs']
-            )
+            from es_client import ResilientESClient
+            import urllib3
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+            
+            # Client partagé par la lecture et l'écriture (pool, timeouts, retries, circuit breaker)
+            self.es_client = ResilientESClient(self.config, self.metrics, self.logger)
             
             # Test de connexion
             info = self.es_client.info()
@@ -168,189 +305,634 @@ class ElkRealtimePredictor:
             self.connected = False
             return False
     
-    def get_latest_binance_data(self, hours_back: int = 168, limit: int = 50000) -> pd.DataFrame:
+    def get_latest_candles(self, symbols: Optional[List[str]] = None,
+                           hours_back: int = 168) -> Dict[str, Dict[str, np.ndarray]]:
         """
-        Récupérer les données Binance les plus récentes depuis Elasticsearch
+        Bougies horaires de plusieurs symboles en une seule requête Elasticsearch
+        
+        Agrégation parente terms sur le symbole, date_histogram horaire en dessous :
+        un aller-retour par cycle quel que soit le nombre de paires.
         
         Args:
-            hours_back: Nombre d'heures de données à récupérer (défaut: 168h = 7 jours)
-            limit: Nombre maximum de records (augmenté à 50000 pour couvrir plus d'heures)
+            symbols: Symboles à récupérer (défaut: config 'symbols', sinon 'symbol')
+            hours_back: Nombre d'heures de données à récupérer
             
         Returns:
-            DataFrame avec les données OHLCV agrégées par heure
+            {symbole: {'dates_ms', 'open', 'high', 'low', 'close', 'volume', 'trades'}}
+            (tableaux NumPy alignés) ; symboles sans donnée absents
         """
+        symbols = symbols or self.config.get('symbols') or [self.config['symbol']]
+        
         if not self.connected:
             self.logger.error("❌ Pas de connexion Elasticsearch active")
-            return pd.DataFrame()
+            return {}
         
         try:
-            # Nouvelle approche: utiliser l'agrégation Elasticsearch pour obtenir des données OHLCV directement
-            # avec un échantillonnage distribué sur la période
-            query = {
-                "size": 0,
-                "query": {
-                    "bool": {
-                        "must": [
-                            {"term": {"symbol.keyword": self.config['symbol']}},
-                            {"range": {
-                                "timestamp": {
-                                    "gte": f"now-{hours_back}h",
-                                    "lte": "now"
-                                }
-                            }}
-                        ]
-                    }
-                },
-                "aggs": {
-                    "price_over_time": {
-                        "date_histogram": {
-                            "field": "timestamp",
-                            "fixed_interval": "1h",
-                            "time_zone": "UTC",
-                            "min_doc_count": 1
-                        },
-                        "aggs": {
-                            "ohlc": {
-                                "stats": {"field": "price"}
+            self.logger.info(f"🔍 Recherche données {', '.join(symbols)} ({hours_back}h)...")
+            
+            response = self.es_client.search(
+                index=self.config['index_pattern'],
+                body=self._candles_query(symbols, hours_back),
+                hedge=True
+            )
+            
+            # Traiter les agrégations (trace de latence propre à chaque symbole)
+            aggs = response.get('aggregations', {})
+            fetch_time_ms = time.time() * 1000
+            for symbol_bucket in aggs.get('by_symbol', {}).get('buckets', []):
+                symbol = symbol_bucket['key']
+                self.latency_traces[symbol] = self._parse_latency_trace(symbol_bucket, fetch_time_ms, symbol)
+            candles = self._parse_symbol_candles(aggs)
+            
+            self.data_source = 'elasticsearch'
+            for symbol, arrays in candles.items():
+                self.candles_cache[symbol] = (arrays, self.latency_traces[symbol])
+            return candles
+            
+        except Exception as e:
+            self.logger.error(f"❌ Erreur récupération données: {e}")
+            return self._cached_candles(symbols)
+    
+    @staticmethod
+    def _candles_query(symbols: List[str], hours_back: int) -> Dict:
+        """Requête OHLCV horaire par symbole (top_metrics pour l'ouverture et la clôture)"""
+        return {
+            "size": 0,
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"terms": {"symbol.keyword": symbols}},
+                        {"range": {
+                            "timestamp": {
+                                "gte": f"now-{hours_back}h",
+                                "lte": "now"
+                            }
+                        }}
+                    ]
+                }
+            },
+            "aggs": {
+                "by_symbol": {
+                    "terms": {"field": "symbol.keyword", "size": len(symbols)},
+                    "aggs": {
+                        "price_over_time": {
+                            "date_histogram": {
+                                "field": "timestamp",
+                                "fixed_interval": "1h",
+                                "time_zone": "UTC",
+                                "min_doc_count": 1
                             },
-                            "first_price": {
-                                "top_hits": {
-                                    "size": 1,
-                                    "sort": [{"timestamp": {"order": "asc"}}],
-                                    "_source": {"includes": ["price"]}
+                            "aggs": {
+                                "ohlc": {
+                                    "stats": {"field": "price"}
+                                },
+                                # top_metrics lit les doc values : pas de chargement du _source comme top_hits
+                                "first_price": {
+                                    "top_metrics": {
+                                        "metrics": {"field": "price"},
+                                        "sort": {"timestamp": "asc"}
+                                    }
+                                },
+                                "last_price": {
+                                    "top_metrics": {
+                                        "metrics": {"field": "price"},
+                                        "sort": {"timestamp": "desc"}
+                                    }
+                                },
+                                "volume": {
+                                    "sum": {"field": "quantity"}
+                                },
+                                "trade_count": {
+                                    "value_count": {"field": "trade_id"}
                                 }
-                            },
-                            "last_price": {
-                                "top_hits": {
-                                    "size": 1,
-                                    "sort": [{"timestamp": {"order": "desc"}}],
-                                    "_source": {"includes": ["price"]}
+                            }
+                        },
+                        # Trace de latence du symbole : dernier trade indexé et horodatages moyens par étape
+                        "last_trade_time": {
+                            "max": {"field": "trade_time"}
+                        },
+                        "latency_trace": {
+                            "filter": {
+                                "bool": {
+                                    "filter": [
+                                        {"range": {"timestamp": {"gte": f"now-{TRACE_WINDOW}"}}},
+                                        {"exists": {"field": "ingest_time_ms"}},
+                                        {"exists": {"field": "logstash_time_ms"}}
+                                    ]
                                 }
                             },
-                            "volume": {
-                                "sum": {"field": "quantity"}
-                            },
-                            "trade_count": {
-                                "value_count": {"field": "trade_id"}
+                            "aggs": {
+                                "trade_time": {"avg": {"field": "trade_time"}},
+                                "event_time": {"avg": {"field": "event_time"}},
+                                "ingest_time": {"avg": {"field": "ingest_time_ms"}},
+                                "logstash_time": {"avg": {"field": "logstash_time_ms"}},
+                                "last_logstash_time": {"max": {"field": "logstash_time_ms"}}
                             }
                         }
                     }
                 }
             }
+        }
+    
+    @staticmethod
+    def _parse_symbol_candles(aggs: Dict) -> Dict[str, Dict[str, np.ndarray]]:
+        """Buckets par symbole → colonnes NumPy (ouverture/clôture de repli : min/max)"""
+        import numpy as np
+        
+        candles = {}
+        for symbol_bucket in aggs.get('by_symbol', {}).get('buckets', []):
+            buckets = symbol_bucket['price_over_time']['buckets']
+            n = len(buckets)
             
-            self.logger.info(f"🔍 Recherche données {self.config['symbol']} ({hours_back}h)...")
-            
-            response = self.es_client.search(
-                index=self.config['index_pattern'],
-                body=query
-            )
-            
-            # Traiter les agrégations
-            aggs = response.get('aggregations', {})
-            buckets = aggs.get('price_over_time', {}).get('buckets', [])
+            def column(get, dtype=np.float64):
+                return np.fromiter((get(b) for b in buckets), dtype=dtype, count=n)
             
-            if not buckets:
-                self.logger.warning(f"⚠️ Aucune donnée agrégée trouvée pour {self.config['symbol']}")
-                return pd.DataFrame()
+            def top_price(name):
+                return lambda b: b[name]['top'][0]['metrics']['price'] if b[name]['top'] else np.nan
             
-            self.logger.info(f"📊 {len(buckets)} points horaires OHLCV trouvés")
+            low = column(lambda b: b['ohlc']['min'])
+            high = column(lambda b: b['ohlc']['max'])
+            first = column(top_price('first_price'))
+            last = column(top_price('last_price'))
+            candles[symbol_bucket['key']] = {
+                'dates_ms': column(lambda b: b['key'], np.int64),
+                'open': np.where(np.isnan(first), low, first),
+                'high': high,
+                'low': low,
+                'close': np.where(np.isnan(last), high, last),
+                'volume': column(lambda b: b['volume']['value'] or 0.0),
+                'trades': column(lambda b: b['trade_count']['value'], np.int64),
+            }
+        return candles
+    
+    def get_latest_binance_data(self, hours_back: int = 168, limit: int = 50000) -> pd.DataFrame:
+        """
+        Récupérer les données Binance les plus récentes depuis Elasticsearch
+        
+        Args:
+            hours_back: Nombre d'heures de données à récupérer (défaut: 168h = 7 jours)
+            limit: Conservé pour compatibilité (l'agrégation ne lit aucun document)
             
-            # Conversion en DataFrame OHLCV
-            data = []
-            for bucket in buckets:
-                timestamp = bucket['key_as_string']
-                stats = bucket['ohlc']
-                first_hit = bucket.get('first_price', {}).get('hits', {}).get('hits', [])
-                last_hit = bucket.get('last_price', {}).get('hits', {}).get('hits', [])
-                
-                # Obtenir les prix Open et Close
-                open_price = first_hit[0]['_source']['price'] if first_hit else stats['min']
-                close_price = last_hit[0]['_source']['price'] if last_hit else stats['max']
-                
-                data.append({
-                    'Date': pd.to_datetime(timestamp),
-                    'Open': float(open_price),
-                    'High': float(stats['max']),
-                    'Low': float(stats['min']),
-                    'Close': float(close_price),
-                    'Volume': float(bucket.get('volume', {}).get('value', 0)),
-                    'Trades_Count': int(bucket.get('trade_count', {}).get('value', 0))
-                })
+        Returns:
+            DataFrame avec les données OHLCV agrégées par heure
+        """
+        return self._primary_frame(self.get_latest_candles([self.config['symbol']], hours_back))
+    
+    def _cycle_symbols(self) -> List[str]:
+        """Symboles d'un cycle : le symbole d'entraînement d'abord, puis config 'symbols'"""
+        return list(dict.fromkeys([self.config['symbol'], *self.config.get('symbols', [])]))
+    
+    def _primary_frame(self, candles: Dict[str, Dict[str, np.ndarray]]) -> pd.DataFrame:
+        """DataFrame OHLCV du symbole d'entraînement extrait d'un fetch multi-symboles"""
+        import pandas as pd
+        
+        symbol = self.config['symbol']
+        candles = candles.get(symbol)
+        if candles is None or len(candles['dates_ms']) == 0:
+            self.logger.warning(f"⚠️ Aucune donnée agrégée trouvée pour {symbol}")
+            return pd.DataFrame()
+        
+        df_hourly = self._candles_frame(candles)
+        self.logger.info(f"✅ {len(df_hourly)} points horaires OHLCV créés")
+        self.logger.info(f"📅 Période: {df_hourly['Date'].min()} → {df_hourly['Date'].max()}")
+        self.logger.info(f"💰 Prix: {df_hourly['Close'].iloc[-1]:.2f}$ (dernier)")
+        return df_hourly
+    
+    @staticmethod
+    def _candles_frame(candles: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """Colonnes NumPy d'un symbole → DataFrame OHLCV (format historique du service)"""
+        import pandas as pd
+        
+        return pd.DataFrame({
+            'Date': pd.to_datetime(candles['dates_ms'], unit='ms', utc=True),
+            'Open': candles['open'],
+            'High': candles['high'],
+            'Low': candles['low'],
+            'Close': candles['close'],
+            'Volume': candles['volume'],
+            'Trades_Count': candles['trades']
+        })
+    
+    def _cached_candles(self, symbols: List[str]) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Bougies de repli quand Elasticsearch est dégradé : dernier fetch réussi en
+        mémoire, sinon clôtures persistées avec le modèle (candles.json, symbole principal).
+        """
+        import numpy as np
+        
+        cached = {}
+        for symbol in symbols:
+            if symbol in self.candles_cache:
+                cached[symbol], trace = self.candles_cache[symbol]
+                self.latency_traces[symbol] = dict(trace)
+                continue
+            if symbol != self.config['symbol']:
+                continue
+            try:
+                with open(os.path.join(self.config['artifacts_dir'], CANDLES_FILE), 'r') as f:
+                    candles = json.load(f)
+            except (OSError, ValueError):
+                continue
+            closes = np.asarray(candles['closes'], dtype=np.float64)
+            cached[symbol] = {
+                'dates_ms': np.array([datetime.fromisoformat(d).timestamp() * 1000 for d in candles['dates']],
+                                     dtype=np.int64),
+                'open': closes, 'high': closes, 'low': closes, 'close': closes,
+                'volume': np.zeros(len(closes)), 'trades': np.zeros(len(closes), dtype=np.int64)
+            }
+        
+        if cached:
+            self.data_source = 'cache'
+            self.logger.warning(
+                "🗄️ Repli sur le cache local: "
+                + ", ".join(f"{symbol} ({len(c['close'])} bougies)" for symbol, c in cached.items())
+            )
+        return cached
+    
+    def _parse_latency_trace(self, symbol_bucket: Dict, fetch_time_ms: float, symbol: str) -> Dict:
+        """
+        Latences par étape à partir des agrégations de trace d'un bucket symbole (en ms).
+        
+        La moyenne d'une différence est la différence des moyennes : les avg ES des
+        horodatages suffisent, sans script. Les horloges des pods sont supposées
+        synchronisées (NTP) ; un écart d'horloge apparaît tel quel dans l'étape concernée.
+        """
+        trace = {'fetch_time_ms': fetch_time_ms}
+        last_trade_time = symbol_bucket.get('last_trade_time', {}).get('value')
+        if last_trade_time is not None:
+            trace['last_trade_time'] = last_trade_time
+        
+        stamps = symbol_bucket.get('latency_trace', {})
+        if not stamps.get('doc_count'):
+            return trace
+        hops = {
+            'exchange_trade_to_event': ('trade_time', 'event_time'),
+            'exchange_to_ingest': ('event_time', 'ingest_time'),
+            'ingest_to_logstash': ('ingest_time', 'logstash_time'),
+        }
+        for hop, (start, end) in hops.items():
+            if stamps[start]['value'] is not None and stamps[end]['value'] is not None:
+                trace[hop] = stamps[end]['value'] - stamps[start]['value']
+        # Indexation + refresh ES + requête : âge du document Logstash le plus récent au fetch
+        if stamps['last_logstash_time']['value'] is not None:
+            trace['logstash_to_fetch'] = fetch_time_ms - stamps['last_logstash_time']['value']
+        
+        for hop in list(hops) + ['logstash_to_fetch']:
+            if hop in trace:
+                self.metrics.observe('predictor_trace_hop_seconds', max(trace[hop], 0.0) / 1000,
+                                     buckets=TRACE_BUCKETS, hop=hop, symbol=symbol)
+        return trace
+    
+    def _latency_trace_fields(self, symbol: str) -> Dict:
+        """Trace de la prédiction courante d'un symbole : étapes mesurées au fetch + fetch → prédiction"""
+        trace = self.latency_traces.get(symbol)
+        if not trace:
+            return {}
+        now_ms = time.time() * 1000
+        fields = {k: round(v, 1) for k, v in trace.items()
+                  if k not in ('fetch_time_ms', 'last_trade_time')}
+        fields['fetch_to_prediction'] = round(now_ms - trace['fetch_time_ms'], 1)
+        self.metrics.observe('predictor_trace_hop_seconds', fields['fetch_to_prediction'] / 1000,
+                             buckets=TRACE_BUCKETS, hop='fetch_to_prediction', symbol=symbol)
+        if 'last_trade_time' in trace:
+            fields['data_freshness'] = round(now_ms - trace['last_trade_time'], 1)
+            self.metrics.observe('predictor_data_freshness_seconds', max(fields['data_freshness'], 0.0) / 1000,
+                                 buckets=TRACE_BUCKETS, symbol=symbol)
+        return fields
+    
+    def create_features(self, prices: np.ndarray, lookback: int = 10,
+                        extra: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Créer les features pour le modèle XGBoost, avec MACD et Bollinger Bands
+        
+        extra: features par bougie alignées sur prices (microstructure), optionnelles
+        """
+        import numpy as np
+        
+        features = [self._feature_row(prices, i, lookback, extra) for i in range(lookback, len(prices))]
+        return np.array(features)
+    
+    @staticmethod
+    def _feature_row(prices: np.ndarray, i: int, lookback: int = 10,
+                     extra: Optional[np.ndarray] = None) -> List[float]:
+        """
+        Features de la ligne i, calculées uniquement à partir de prices[:i] (et extra[i-1]).
+        
+        Avec i = len(prices), on obtient la ligne servant à prédire le prochain prix.
+        """
+        import numpy as np
+        
+        price_features = prices[i-lookback:i].tolist()
+        # SMA
+        sma_3 = np.mean(prices[i-3:i]) if i >= 3 else prices[i-1]
+        sma_5 = np.mean(prices[i-5:i]) if i >= 5 else prices[i-1]
+        # Momentum et volatilité
+        momentum = prices[i-1] - prices[i-2] if i >= 2 else 0
+        volatility = np.std(prices[max(0, i-5):i]) if i >= 5 else 0
+        # RSI simplifié
+        gains = []
+        losses = []
+        for j in range(max(1, i-14), i):
+            change = prices[j] - prices[j-1] if j > 0 else 0
+            if change > 0:
+                gains.append(change)
+            else:
+                losses.append(-change)
+        avg_gain = np.mean(gains) if gains else 0
+        avg_loss = np.mean(losses) if losses else 0.001
+        rs = avg_gain / avg_loss
+        rsi = 100 - (100 / (1 + rs))
+        # MACD
+        ema_12 = np.mean(prices[i-12:i]) if i >= 12 else prices[i-1]
+        ema_26 = np.mean(prices[i-26:i]) if i >= 26 else prices[i-1]
+        macd = ema_12 - ema_26
+        # Bollinger Bands
+        bb_window = 20
+        if i >= bb_window:
+            bb_ma = np.mean(prices[i-bb_window:i])
+            bb_std = np.std(prices[i-bb_window:i])
+            bb_upper = bb_ma + 2 * bb_std
+            bb_lower = bb_ma - 2 * bb_std
+        else:
+            bb_ma = prices[i-1]
+            bb_upper = prices[i-1]
+            bb_lower = prices[i-1]
+        row = price_features + [sma_3, sma_5, momentum, volatility, rsi, macd, bb_ma, bb_upper, bb_lower]
+        if extra is not None:
+            row.extend(extra[i-1].tolist())
+        return row
+    
+    @staticmethod
+    def _last_feature_rows(windows: np.ndarray, lookback: int = 10,
+                           extra: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Équivalent vectorisé de _feature_row(prices, len(prices)) pour K séries à la fois.
+        
+        Args:
+            windows: (K, W) derniers prix (normalisés) de chaque série, W >= FORECAST_WINDOW
+            extra: (K, n_extra) features de la dernière bougie de chaque série, optionnelles
             
-            df_hourly = pd.DataFrame(data)
+        Returns:
+            (K, n_features), identique ligne à ligne à _feature_row
+        """
+        import numpy as np
+        
+        # RSI simplifié : moyenne des hausses, et des baisses (zéros compris) sur 14 variations
+        changes = np.diff(windows[:, -15:], axis=1)
+        up = changes > 0
+        n_up = up.sum(axis=1)
+        n_down = changes.shape[1] - n_up
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_gain = np.where(n_up > 0, np.where(up, changes, 0).sum(axis=1) / n_up, 0)
+            avg_loss = np.where(n_down > 0, np.where(up, 0, -changes).sum(axis=1) / n_down, 0.001)
+            rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+        
+        bb_ma = windows[:, -20:].mean(axis=1)
+        bb_std = windows[:, -20:].std(axis=1)
+        columns = [
+            windows[:, -lookback:],
+            windows[:, -3:].mean(axis=1, keepdims=True),
+            windows[:, -5:].mean(axis=1, keepdims=True),
+            (windows[:, -1] - windows[:, -2])[:, None],
+            windows[:, -5:].std(axis=1, keepdims=True),
+            rsi[:, None],
+            (windows[:, -12:].mean(axis=1) - windows[:, -26:].mean(axis=1))[:, None],
+            bb_ma[:, None],
+            (bb_ma + 2 * bb_std)[:, None],
+            (bb_ma - 2 * bb_std)[:, None],
+        ]
+        if extra is not None:
+            columns.append(extra)
+        return np.hstack(columns)
+    
+    @classmethod
+    def forecast_paths(cls, predict, windows: np.ndarray, horizon: int, lookback: int = 10,
+                       extra: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Prévision récursive sur horizon pas pour K séries, en un appel.
+        
+        Chaque valeur prédite est ajoutée à la fenêtre glissante de sa série et seule
+        la ligne de features suivante est recalculée : O(horizon × FORECAST_WINDOW),
+        indépendant de la longueur de l'historique. Une seule inférence par pas
+        pour toutes les séries.
+        
+        Args:
+            predict: fonction (K, n_features) → (K,) ou (K, len(QUANTILES)) (XGBRegressor.predict,
+                     NumpyBooster.predict) ; la trajectoire suit la médiane
+            windows: (K, W) derniers prix normalisés, W >= FORECAST_WINDOW
+            extra: (K, n_extra) microstructure de la dernière bougie connue, reconduite
+                   sur les bougies futures (persistance)
             
-            if len(df_hourly) == 0:
-                self.logger.warning("⚠️ DataFrame OHLCV vide après conversion")
-                return df_hourly
+        Returns:
+            (K, horizon) prix normalisés prédits, et la sortie brute du premier pas
+            (quantiles de la prochaine bougie : l'intervalle sans seconde inférence)
+        """
+        import numpy as np
+        
+        windows = np.asarray(windows, dtype=np.float64)
+        n_series, width = windows.shape
+        if width < FORECAST_WINDOW:
+            raise ValueError(f"Fenêtre de {width} prix, {FORECAST_WINDOW} requis")
+        buffer = np.empty((n_series, FORECAST_WINDOW + horizon))
+        buffer[:, :FORECAST_WINDOW] = windows[:, -FORECAST_WINDOW:]
+        first = None
+        for step in range(horizon):
+            rows = cls._last_feature_rows(buffer[:, step:step + FORECAST_WINDOW], lookback, extra)
+            predicted = predict(rows)
+            if first is None:
+                first = predicted
+            buffer[:, FORECAST_WINDOW + step] = predicted[:, 1] if predicted.ndim == 2 else predicted
+        return buffer[:, FORECAST_WINDOW:], first
+    
+    def forecast_symbols(self, candles: Dict[str, Dict[str, np.ndarray]],
+                         horizon: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Trajectoires en $ de plusieurs symboles avec le dernier modèle entraîné.
+        
+        Les features étant calculées sur des prix normalisés, chaque symbole est
+        normalisé sur sa propre fenêtre (comme le symbole d'entraînement) ;
+        toutes les séries sont prédites ensemble à chaque pas.
+        
+        Seul le symbole d'entraînement reçoit sa microstructure et la correction
+        conforme : les volumes des autres sont en unités de leur propre actif, hors
+        de la distribution d'entraînement (features NaN = manquantes pour XGBoost),
+        et leurs bornes sont les quantiles bruts du modèle.
+        
+        Args:
+            candles: sortie de get_latest_candles
+            horizon: heures à prédire (défaut: config 'forecast_horizon_hours')
             
-            self.logger.info(f"✅ {len(df_hourly)} points horaires OHLCV créés")
-            if len(df_hourly) > 0:
-                self.logger.info(f"📅 Période: {df_hourly['Date'].min()} → {df_hourly['Date'].max()}")
-                self.logger.info(f"💰 Prix: {df_hourly['Close'].iloc[-1]:.2f}$ (dernier)")
+        Returns:
+            {symbole: ((horizon,) prix prédits, bornes (basse, haute) du premier pas
+            ou None)} ; symboles à historique trop court absents
+        """
+        import numpy as np
+        
+        if self.last_model is None:
+            raise RuntimeError("Aucun modèle entraîné")
+        horizon = horizon or self.config.get('forecast_horizon_hours', FORECAST_HORIZON_HOURS)
+        symbols = [s for s, c in candles.items() if len(c['close']) >= FORECAST_WINDOW]
+        if not symbols:
+            return {}
+        
+        closes = np.stack([candles[s]['close'][-FORECAST_WINDOW:] for s in symbols])
+        low = np.array([candles[s]['close'].min() for s in symbols])[:, None]
+        span = np.array([np.ptp(candles[s]['close']) or 1.0 for s in symbols])[:, None]
+        extra = None
+        if self.model_version == MICRO_MODEL_VERSION:
+            from microstructure import MICRO_FEATURES, load_microstructure
             
-            return df_hourly
+            extra = np.full((len(symbols), len(MICRO_FEATURES)), np.nan)
+            if self.config['symbol'] in symbols:
+                k = symbols.index(self.config['symbol'])
+                last = load_microstructure(symbols[k], candles[symbols[k]]['dates_ms'][-1:], CANDLE_INTERVAL_MS)
+                if last is not None:
+                    extra[k] = last[0]
+        
+        paths, first = self.forecast_paths(self.last_model.predict, (closes - low) / span, horizon, 10, extra)
+        intervals = [None] * len(symbols)
+        if first.ndim == 2:
+            adjustment = np.array([self.interval_adjustment if s == self.config['symbol'] else 0.0 for s in symbols])
+            bounds = self._calibrated_quantiles(first, adjustment)[:, [0, 2]] * span + low
+            intervals = [tuple(b) for b in bounds]
+        return {symbol: (path, interval) for symbol, path, interval in zip(symbols, paths * span + low, intervals)}
+    
+    def predict_symbols(self, candles: Dict[str, Dict[str, np.ndarray]], reference: Dict) -> List[Dict]:
+        """
+        Prédire les autres symboles du cycle avec le modèle qui vient d'être entraîné.
+        
+        Une trajectoire groupée (forecast_symbols) sur les bougies du fetch du cycle,
+        puis un document par symbole, avec sa trace de latence et son suivi de précision.
+        Le modèle n'étant pas calibré sur ces symboles, leur intervalle est marqué
+        non calibré et sans couverture mesurée.
+        
+        Args:
+            candles: sortie de get_latest_candles (le symbole d'entraînement est ignoré)
+            reference: prédiction du symbole d'entraînement (scores du modèle)
             
+        Returns:
+            Prédictions des symboles ayant assez d'historique
+        """
+        others = {s: c for s, c in candles.items() if s != self.config['symbol']}
+        if not others or not reference['success']:
+            return []
+        predictions = []
+        try:
+            with self._stage('inference'):
+                forecasts = self.forecast_symbols(others)
+            for symbol, (trajectory, interval) in forecasts.items():
+                symbol_candles = candles[symbol]
+                self.accuracy.resolve(symbol, symbol_candles['dates_ms'], symbol_candles['close'])
+                prediction = self._build_prediction(
+                    symbol_candles['close'][-1], trajectory[0],
+                    datetime.fromtimestamp(symbol_candles['dates_ms'][-1] / 1000, tz=timezone.utc),
+                    len(symbol_candles['close']), reference['model_score_val'], reference['model_score_test'],
+                    reference['model_features'], trajectory, interval, symbol, calibrated=False
+                )
+                self._track_prediction(prediction)
+                self.predictions_history.append(prediction)
+                with self._stage('es_write'):
+                    self.save_prediction_to_elasticsearch(prediction)
+                self.logger.info(
+                    f"🔭 {symbol}: ${prediction['current_price']:,.2f} → ${prediction['predicted_next_price']:,.2f} "
+                    f"({prediction['price_change_pct']:+.2f}%) | {len(trajectory)}h: ${trajectory[-1]:,.2f} | "
+                    f"{prediction['trading_signal']}"
+                )
+                predictions.append(prediction)
         except Exception as e:
-            self.logger.error(f"❌ Erreur récupération données: {e}")
-            return pd.DataFrame()
+            self.logger.error(f"❌ Erreur prédiction multi-symboles: {e}")
+        return predictions
     
-    def create_features(self, prices: np.ndarray, lookback: int = 10) -> np.ndarray:
+    def _load_microstructure(self, df: pd.DataFrame) -> Optional[np.ndarray]:
         """
-        Créer les features pour le modèle XGBoost, avec MACD et Bollinger Bands
+        Microstructure des bougies de df, agrégée depuis le ring mmap du backend.
+        
+        Aucun coût Elasticsearch ; None si désactivée ou si le ring est absent.
         """
-        features = []
-        for i in range(lookback, len(prices)):
-            price_features = prices[i-lookback:i].tolist()
-            # SMA
-            sma_3 = np.mean(prices[i-3:i]) if i >= 3 else prices[i-1]
-            sma_5 = np.mean(prices[i-5:i]) if i >= 5 else prices[i-1]
-            # Momentum et volatilité
-            momentum = prices[i-1] - prices[i-2] if i >= 2 else 0
-            volatility = np.std(prices[max(0, i-5):i]) if i >= 5 else 0
-            # RSI simplifié
-            gains = []
-            losses = []
-            for j in range(max(1, i-14), i):
-                change = prices[j] - prices[j-1] if j > 0 else 0
-                if change > 0:
-                    gains.append(change)
-                else:
-                    losses.append(-change)
-            avg_gain = np.mean(gains) if gains else 0
-            avg_loss = np.mean(losses) if losses else 0.001
-            rs = avg_gain / avg_loss
-            rsi = 100 - (100 / (1 + rs))
-            # MACD
-            ema_12 = np.mean(prices[i-12:i]) if i >= 12 else prices[i-1]
-            ema_26 = np.mean(prices[i-26:i]) if i >= 26 else prices[i-1]
-            macd = ema_12 - ema_26
-            # Bollinger Bands
-            bb_window = 20
-            if i >= bb_window:
-                bb_ma = np.mean(prices[i-bb_window:i])
-                bb_std = np.std(prices[i-bb_window:i])
-                bb_upper = bb_ma + 2 * bb_std
-                bb_lower = bb_ma - 2 * bb_std
-            else:
-                bb_ma = prices[i-1]
-                bb_upper = prices[i-1]
-                bb_lower = prices[i-1]
-            all_features = price_features + [sma_3, sma_5, momentum, volatility, rsi, macd, bb_ma, bb_upper, bb_lower]
-            features.append(all_features)
-        return np.array(features)
+        if not self.config.get('use_microstructure', True):
+            return None
+        from microstructure import load_microstructure
+        
+        try:
+            starts_ms = df['Date'].values.astype('datetime64[ms]').astype('int64')
+            extra = load_microstructure(self.config['symbol'], starts_ms, CANDLE_INTERVAL_MS)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"⚠️ Microstructure indisponible: {e}")
+            return None
+        if extra is None:
+            self.logger.info("💡 Ring des bougies absent: modèle sans microstructure")
+        return extra
+    
+    @staticmethod
+    def _calibrated_quantiles(predicted: np.ndarray, adjustment: float = 0.0) -> np.ndarray:
+        """
+        Quantiles (n, 3) prédits → (borne basse, médiane, borne haute) calibrées.
+        
+        Les bornes croisées sont réordonnées, élargies (ou resserrées) de adjustment
+        (scalaire, ou (n,) par ligne) et encadrent toujours la médiane.
+        """
+        import numpy as np
+        
+        median = predicted[:, 1]
+        lower = np.minimum(predicted[:, 0], predicted[:, 2]) - adjustment
+        upper = np.maximum(predicted[:, 0], predicted[:, 2]) + adjustment
+        return np.column_stack([np.minimum(lower, median), median, np.maximum(upper, median)])
     
-    def train_xgboost_model(self, df: pd.DataFrame, target_col: str = 'Close') -> Tuple[Optional[xgb.XGBRegressor], float, float]:
+    @staticmethod
+    def _conformal_adjustment(y: np.ndarray, predicted: np.ndarray) -> float:
+        """
+        Correction conforme (CQR) des bornes, estimée sur la validation.
+        
+        Score de non-conformité max(basse - y, y - haute) ; son quantile d'ordre
+        ⌈(n+1)(1-α)⌉/n donne la couverture nominale QUANTILES[-1] - QUANTILES[0].
+        """
+        import numpy as np
+        
+        quantiles = ElkRealtimePredictor._calibrated_quantiles(predicted)
+        scores = np.maximum(quantiles[:, 0] - y, y - quantiles[:, 2])
+        n = len(scores)
+        level = min(1.0, np.ceil((n + 1) * (QUANTILES[-1] - QUANTILES[0])) / n)
+        return float(np.quantile(scores, level, method='higher'))
+    
+    @staticmethod
+    def _direction_confidence(current_price: float, lower: float, median: float, upper: float) -> float:
+        """
+        Probabilité que le prix évolue dans le sens de la médiane prédite.
+        
+        Fonction de répartition interpolée linéairement entre les quantiles, évaluée au
+        prix courant ; bornée à [0.5, QUANTILES[-1]] (au-delà de l'intervalle : « au moins »).
+        """
+        import numpy as np
+        
+        cdf = float(np.interp(current_price, [lower, median, upper], QUANTILES))
+        return max(0.5, 1 - cdf if median >= current_price else cdf)
+    
+    def train_xgboost_model(self, df: pd.DataFrame, target_col: str = 'Close',
+                            extra: Optional[np.ndarray] = None) -> Tuple[Optional[xgb.XGBRegressor], float, float]:
         """
         Entraîner le modèle XGBoost avec early stopping et split train/val/test
-        Retourne le modèle, le score validation et le score test
+        Retourne le modèle, le score validation et le score test (MAE de la médiane)
+        
+        Un seul modèle prédit les QUANTILES (reg:quantileerror) : les bornes de
+        l'intervalle sont calibrées sur la validation (interval_adjustment) et leur
+        couverture mesurée sur le test (interval_coverage).
+        
+        extra: features de microstructure par bougie (NaN = manquant pour XGBoost)
         """
+        import numpy as np
+        import xgboost as xgb
+        from sklearn.preprocessing import MinMaxScaler
+        from sklearn.metrics import mean_absolute_error
+        
         try:
             if len(df) < 60:
                 self.logger.warning(f"⚠️ Pas assez de données: {len(df)} < 60")
                 return None, 0.0, 0.0
             prices = df[target_col].values
+            self.scaler = MinMaxScaler(feature_range=(0, 1))
             prices_scaled = self.scaler.fit_transform(prices.reshape(-1, 1)).flatten()
-            X = self.create_features(prices_scaled, lookback=10)
+            with self._stage('features'):
+                X = self.create_features(prices_scaled, lookback=10, extra=extra)
             y = prices_scaled[10:]
             if len(X) < 30:
                 self.logger.warning(f"⚠️ Pas assez de features: {len(X)} < 30")
@@ -361,29 +943,39 @@ class ElkRealtimePredictor:
             val_idx = int(0.85 * n)
             X_train, X_val, X_test = X[:train_idx], X[train_idx:val_idx], X[val_idx:]
             y_train, y_val, y_test = y[:train_idx], y[train_idx:val_idx], y[val_idx:]
-            model = xgb.XGBRegressor(
-                n_estimators=300,
-                max_depth=8,
-                learning_rate=0.05,
-                subsample=0.8,
-                colsample_bytree=0.8,
-                random_state=42,
-                objective='reg:squarederror',
-                verbosity=0,
-                n_jobs=-1
-            )
-            model.fit(
-                X_train, y_train,
-                eval_set=[(X_val, y_val)],
-                early_stopping_rounds=20,
-                verbose=False
-            )
-            y_val_pred = model.predict(X_val)
-            y_test_pred = model.predict(X_test)
-            mae_val = mean_absolute_error(y_val, y_val_pred)
-            mae_test = mean_absolute_error(y_test, y_test_pred)
+            with self._stage('train'):
+                model = xgb.XGBRegressor(
+                    n_estimators=300,
+                    max_depth=8,
+                    learning_rate=0.05,
+                    subsample=0.8,
+                    colsample_bytree=0.8,
+                    random_state=42,
+                    objective='reg:quantileerror',
+                    quantile_alpha=np.array(QUANTILES),
+                    verbosity=0,
+                    n_jobs=-1
+                )
+                model.fit(
+                    X_train, y_train,
+                    eval_set=[(X_val, y_val)],
+                    early_stopping_rounds=20,
+                    verbose=False
+                )
+                y_val_pred = model.predict(X_val)
+                y_test_pred = model.predict(X_test)
+            mae_val = mean_absolute_error(y_val, y_val_pred[:, 1])
+            mae_test = mean_absolute_error(y_test, y_test_pred[:, 1])
+            self.interval_adjustment = self._conformal_adjustment(y_val, y_val_pred)
+            test_quantiles = self._calibrated_quantiles(y_test_pred, self.interval_adjustment)
+            self.interval_coverage = float(np.mean((y_test >= test_quantiles[:, 0]) & (y_test <= test_quantiles[:, 2])))
             self.logger.info(f"✅ Modèle entraîné - MAE val: {mae_val:.6f} | MAE test: {mae_test:.6f}")
+            self.logger.info(
+                f"📐 Intervalle {QUANTILES[0]:.0%}-{QUANTILES[-1]:.0%}: correction {self.interval_adjustment:+.6f} | "
+                f"couverture test {self.interval_coverage:.0%}"
+            )
             self.last_model = model
+            self.model_version = MODEL_VERSION if extra is None else MICRO_MODEL_VERSION
             return model, mae_val, mae_test
         except Exception as e:
             self.logger.error(f"❌ Erreur entraînement modèle: {e}")
@@ -401,47 +993,243 @@ class ElkRealtimePredictor:
             Dict avec les informations de prédiction
         """
         try:
+            with self._stage('features'):
+                extra = self._load_microstructure(df)
             # Entraîner le modèle
-            model, mae_val, mae_test = self.train_xgboost_model(df, target_col)
+            model, mae_val, mae_test = self.train_xgboost_model(df, target_col, extra)
             if model is None:
                 return {
                     'success': False,
                     'error': 'Erreur entraînement modèle',
                     'timestamp': datetime.now()
                 }
+            import numpy as np
+            
             prices = df[target_col].values
             prices_scaled = self.scaler.transform(prices.reshape(-1, 1)).flatten()
-            X_pred = self.create_features(prices_scaled, lookback=10)
-            if len(X_pred) == 0:
-                return {
-                    'success': False,
-                    'error': 'Pas assez de données pour prédiction',
-                    'timestamp': datetime.now()
+            # Ligne de features du prochain pas : construite sur tous les prix connus
+            with self._stage('features'):
+                x_next = np.array(self._feature_row(prices_scaled, len(prices_scaled), lookback=10, extra=extra))
+            # Trajectoire : le premier pas est la prédiction (quantiles) de la prochaine bougie
+            with self._stage('inference'):
+                paths, first = self.forecast_paths(
+                    model.predict, prices_scaled[None, :], self.config['forecast_horizon_hours'], 10,
+                    None if extra is None else extra[-1:]
+                )
+                trajectory = self.scaler.inverse_transform(paths[0].reshape(-1, 1)).flatten()
+                next_price = trajectory[0]
+                bounds = self._calibrated_quantiles(first, self.interval_adjustment)[0]
+                interval = tuple(self.scaler.inverse_transform(bounds[[0, 2]].reshape(-1, 1)).flatten())
+            with self._stage('persist'):
+                self.save_model_artifacts(model, df, target_col, mae_val, mae_test, extra)
+            dates_ms = df['Date'].values.astype('datetime64[ms]').astype(np.int64)
+            self.accuracy.resolve(self.config['symbol'], dates_ms, prices)
+            prediction_info = self._build_prediction(
+                prices[-1], next_price, df['Date'].iloc[-1], len(df), mae_val, mae_test, len(x_next), trajectory,
+                interval
+            )
+            self._track_prediction(prediction_info)
+            self.predictions_history.append(prediction_info)
+            with self._stage('es_write'):
+                self.save_prediction_to_elasticsearch(prediction_info)
+            return prediction_info
+        except Exception as e:
+            self.logger.error(f"❌ Erreur prédiction: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'timestamp': datetime.now()
+            }
+    
+    def _build_prediction(self, current_price: float, next_price: float, current_time,
+                          data_points: int, mae_val: float, mae_test: float, n_features: int,
+                          trajectory: np.ndarray, interval: Optional[Tuple[float, float]],
+                          symbol: Optional[str] = None, calibrated: bool = True) -> Dict:
+        """
+        Construire le dict de prédiction commun aux modes entraînement et inférence seule
+        
+        trajectory: prix prédits heure par heure (trajectory[0] = next_price)
+        interval: bornes calibrées (basse, haute) de next_price ; None pour un modèle
+                  sans quantiles (artefacts antérieurs), le signal n'est alors pas pondéré
+        symbol: symbole prédit (défaut: symbole d'entraînement, config 'symbol')
+        calibrated: False si interval sont les quantiles bruts d'un modèle calibré sur un
+                    autre symbole (pas de couverture de test)
+        """
+        symbol = symbol or self.config['symbol']
+        price_change = next_price - current_price
+        price_change_pct = (price_change / current_price) * 100
+        confidence = None
+        if interval is not None:
+            confidence = self._direction_confidence(current_price, interval[0], next_price, interval[1])
+        return {
+            'success': True,
+            'timestamp': datetime.now(),
+            'data_timestamp': current_time,
+            'current_price': float(current_price),
+            'predicted_next_price': float(next_price),
+            'price_change': float(price_change),
+            'price_change_pct': float(price_change_pct),
+            'model_score_val': float(mae_val),
+            'model_score_test': float(mae_test),
+            'data_points_used': data_points,
+            'model_features': n_features,
+            'symbol': symbol,
+            'model_symbol': self.config['symbol'],
+            'stage_timings_ms': {k: round(v, 3) for k, v in self.stage_timings.items()},
+            'latency_trace_ms': self._latency_trace_fields(symbol),
+            'data_source': self.data_source,
+            'model_version': self.model_version,
+            'online_accuracy': self.accuracy.snapshot(symbol, self.model_version),
+            'forecast_horizon_hours': len(trajectory),
+            'forecast_trajectory': [float(p) for p in trajectory],
+            'prediction_interval': None if interval is None else {
+                'lower': float(interval[0]),
+                'upper': float(interval[1]),
+                'quantiles': [QUANTILES[0], QUANTILES[-1]],
+                'calibrated': calibrated,
+                **({'coverage_test': self.interval_coverage} if calibrated else {})
+            },
+            'direction_confidence': confidence,
+            'trading_signal': self._get_trading_signal(price_change_pct, confidence),
+            'signal_strength': self._get_signal_strength(price_change_pct, confidence)
+        }
+    
+    def _track_prediction(self, prediction: Dict):
+        """Mettre la prédiction en attente de la clôture de la bougie suivante et persister l'état"""
+        target_time_ms = int(prediction['data_timestamp'].timestamp() * 1000) + CANDLE_INTERVAL_MS
+        self.accuracy.record(
+            prediction['symbol'], prediction['model_version'], target_time_ms,
+            prediction['current_price'], prediction['predicted_next_price'], prediction['trading_signal']
+        )
+        try:
+            self.accuracy.save()
+        except OSError as e:
+            self.logger.warning(f"⚠️ Erreur sauvegarde suivi de précision: {e}")
+    
+    def save_model_artifacts(self, model: xgb.XGBRegressor, df: pd.DataFrame, target_col: str,
+                             mae_val: float, mae_test: float, extra: Optional[np.ndarray] = None):
+        """
+        Persister le booster (JSON), le scaler et les dernières bougies pour le mode inférence seule.
+        
+        Écritures atomiques (tmp + rename) : un pod en inférence seule ne lit jamais
+        un fichier à moitié écrit.
+        """
+        from microstructure import MICRO_FEATURES
+        
+        artifacts_dir = self.config['artifacts_dir']
+        try:
+            os.makedirs(artifacts_dir, exist_ok=True)
+            
+            model_path = os.path.join(artifacts_dir, MODEL_FILE)
+            model.get_booster().save_model(model_path + '.tmp.json')
+            os.replace(model_path + '.tmp.json', model_path)
+            
+            candles = df.tail(CACHED_CANDLES)
+            documents = {
+                META_FILE: {
+                    'symbol': self.config['symbol'],
+                    'trained_at': datetime.now().isoformat(),
+                    'lookback': 10,
+                    'model_version': self.model_version,
+                    'microstructure_features': [] if extra is None else list(MICRO_FEATURES),
+                    'model_score_val': float(mae_val),
+                    'model_score_test': float(mae_test),
+                    'quantiles': list(QUANTILES),
+                    'interval_adjustment': self.interval_adjustment,
+                    'interval_coverage_test': self.interval_coverage,
+                    'data_points_used': len(df),
+                    'scaler': {
+                        'data_min': float(self.scaler.data_min_[0]),
+                        'data_max': float(self.scaler.data_max_[0]),
+                        'feature_range': list(self.scaler.feature_range)
+                    }
+                },
+                CANDLES_FILE: {
+                    'symbol': self.config['symbol'],
+                    'dates': [d.isoformat() for d in candles['Date']],
+                    'closes': [float(p) for p in candles[target_col]],
+                    # NaN (heure hors ring) → null
+                    'microstructure': None if extra is None else [
+                        [None if v != v else float(v) for v in row] for row in extra[-len(candles):]
+                    ]
                 }
-            next_price_scaled = model.predict(X_pred[-1].reshape(1, -1))[0]
-            next_price = self.scaler.inverse_transform([[next_price_scaled]])[0][0]
-            current_price = prices[-1]
-            current_time = df['Date'].iloc[-1]
-            price_change = next_price - current_price
-            price_change_pct = (price_change / current_price) * 100
-            prediction_info = {
-                'success': True,
-                'timestamp': datetime.now(),
-                'data_timestamp': current_time,
-                'current_price': float(current_price),
-                'predicted_next_price': float(next_price),
-                'price_change': float(price_change),
-                'price_change_pct': float(price_change_pct),
-                'model_score_val': float(mae_val),
-                'model_score_test': float(mae_test),
-                'data_points_used': len(df),
-                'symbol': self.config['symbol']
             }
+            for filename, document in documents.items():
+                path = os.path.join(artifacts_dir, filename)
+                with open(path + '.tmp', 'w') as f:
+                    json.dump(document, f)
+                os.replace(path + '.tmp', path)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Erreur sauvegarde artefacts modèle: {e}")
+    
+    def predict_from_artifacts(self) -> Dict:
+        """
+        Prédiction sans Elasticsearch ni entraînement, à partir des artefacts persistés.
+        
+        N'importe que NumPy : le booster est évalué par booster_inference.NumpyBooster.
+        """
+        import numpy as np
+        from booster_inference import NumpyBooster
+        
+        artifacts_dir = self.config['artifacts_dir']
+        try:
+            with self._stage('load'):
+                booster = NumpyBooster.load(os.path.join(artifacts_dir, MODEL_FILE))
+                with open(os.path.join(artifacts_dir, META_FILE), 'r') as f:
+                    meta = json.load(f)
+                with open(os.path.join(artifacts_dir, CANDLES_FILE), 'r') as f:
+                    candles = json.load(f)
+            
+            # Réappliquer le MinMaxScaler persisté
+            scaler = meta['scaler']
+            range_min, range_max = scaler['feature_range']
+            data_range = (scaler['data_max'] - scaler['data_min']) or 1.0
+            scale = (range_max - range_min) / data_range
+            
+            prices = np.asarray(candles['closes'], dtype=np.float64)
+            prices_scaled = (prices - scaler['data_min']) * scale + range_min
+            extra = None
+            if meta.get('microstructure_features'):
+                extra = np.array(candles['microstructure'], dtype=np.float64)
+            with self._stage('features'):
+                x_next = np.array(self._feature_row(prices_scaled, len(prices_scaled), meta['lookback'], extra))
+            # Horizon court (inference_forecast_horizon_hours) : une inférence NumPy par pas
+            with self._stage('inference'):
+                paths, first = self.forecast_paths(
+                    booster.predict, prices_scaled[None, :], self.config['inference_forecast_horizon_hours'],
+                    meta['lookback'], None if extra is None else extra[-1:]
+                )
+                trajectory = (paths[0] - range_min) / scale + scaler['data_min']
+                next_price = trajectory[0]
+                # Artefacts antérieurs aux quantiles : une seule sortie, pas d'intervalle
+                interval = None
+                predicted = np.atleast_2d(first)
+                if predicted.shape[1] == len(QUANTILES):
+                    bounds = self._calibrated_quantiles(predicted, meta.get('interval_adjustment', 0.0))[0]
+                    interval = tuple((bounds[[0, 2]] - range_min) / scale + scaler['data_min'])
+            
+            self.logger.info(f"📦 Modèle entraîné le {meta['trained_at']} | bougies jusqu'au {candles['dates'][-1]}")
+            self.model_version = meta.get('model_version', MODEL_VERSION)
+            self.interval_coverage = meta.get('interval_coverage_test')
+            dates_ms = np.array([datetime.fromisoformat(d).timestamp() * 1000 for d in candles['dates']], dtype=np.int64)
+            self.accuracy.resolve(self.config['symbol'], dates_ms, prices)
+            prediction_info = self._build_prediction(
+                prices[-1], next_price, datetime.fromisoformat(candles['dates'][-1]),
+                len(prices), meta['model_score_val'], meta['model_score_test'], len(x_next), trajectory, interval
+            )
+            self._track_prediction(prediction_info)
             self.predictions_history.append(prediction_info)
-            self.save_prediction_to_elasticsearch(prediction_info)
             return prediction_info
+        except FileNotFoundError as e:
+            self.logger.error(f"❌ Artefacts introuvables dans {artifacts_dir}: {e.filename}")
+            self.logger.info("💡 Lancez d'abord une prédiction avec entraînement pour les créer")
+            return {
+                'success': False,
+                'error': 'Artefacts modèle introuvables',
+                'timestamp': datetime.now()
+            }
         except Exception as e:
-            self.logger.error(f"❌ Erreur prédiction: {e}")
+            self.logger.error(f"❌ Erreur prédiction inférence seule: {e}")
             return {
                 'success': False,
                 'error': str(e),
@@ -464,15 +1252,48 @@ class ElkRealtimePredictor:
         self.logger.info(f"🎯 MAE validation: {prediction['model_score_val']:.6f}")
         self.logger.info(f"🎯 MAE test: {prediction['model_score_test']:.6f}")
         self.logger.info(f"📊 Points utilisés: {prediction['data_points_used']}")
-        # Signal trading
-        if prediction['price_change_pct'] > 2:
+        trajectory = prediction.get('forecast_trajectory', [])
+        if len(trajectory) > 1:
+            end_pct = (trajectory[-1] / prediction['current_price'] - 1) * 100
+            self.logger.info(
+                f"🔭 Trajectoire {len(trajectory)}h: ${min(trajectory):,.2f} → ${max(trajectory):,.2f} | "
+                f"fin ${trajectory[-1]:,.2f} ({end_pct:+.2f}%)"
+            )
+        timings = prediction.get('stage_timings_ms', {})
+        if timings:
+            self.logger.info("⏱️  Étapes: " + " | ".join(f"{k} {v:.1f}ms" for k, v in timings.items()))
+        accuracy = prediction.get('online_accuracy', {})
+        if accuracy.get('samples'):
+            signal_rate = accuracy['signal_hit_rate']
+            self.logger.info(
+                f"📏 Précision en ligne ({accuracy['samples']} résolues): MAE {accuracy['mae']:,.2f}$ | "
+                f"direction {accuracy['directional_accuracy']:.0%} | signaux "
+                + (f"{signal_rate:.0%} ({accuracy['signals']})" if signal_rate is not None else "n/a")
+            )
+        trace = prediction.get('latency_trace_ms', {})
+        if trace:
+            self.logger.info("🛰️  Trace: " + " | ".join(f"{k} {v / 1000:.2f}s" for k, v in trace.items()))
+        interval = prediction.get('prediction_interval')
+        if interval:
+            coverage = interval['coverage_test']
+            self.logger.info(
+                f"📐 Intervalle {interval['quantiles'][0]:.0%}-{interval['quantiles'][1]:.0%}: "
+                f"${interval['lower']:,.2f} → ${interval['upper']:,.2f} | "
+                f"confiance direction {prediction['direction_confidence']:.0%}"
+                + (f" | couverture test {coverage:.0%}" if coverage is not None else "")
+            )
+        # Signal trading (pondéré par l'intervalle)
+        signal = prediction['trading_signal']
+        if signal == "STRONG_BUY":
             self.logger.info("🟢 SIGNAL: ACHAT FORT recommandé (>2%)")
-        elif prediction['price_change_pct'] > 0.5:
-            self.logger.info("🟢 Signal: Achat potentiel (0.5-2%)")
-        elif prediction['price_change_pct'] < -2:
+        elif signal == "BUY":
+            self.logger.info("🟢 Signal: Achat potentiel (>0.5%)")
+        elif signal == "STRONG_SELL":
             self.logger.info("🔴 SIGNAL: VENTE FORTE recommandée (<-2%)")
-        elif prediction['price_change_pct'] < -0.5:
-            self.logger.info("🔴 Signal: Vente potentielle (-0.5 à -2%)")
+        elif signal == "SELL":
+            self.logger.info("🔴 Signal: Vente potentielle (<-0.5%)")
+        elif abs(prediction['price_change_pct']) > 0.5:
+            self.logger.info("🟡 Signal: HOLD - Intervalle trop incertain")
         else:
             self.logger.info("🟡 Signal: HOLD - Mouvement faible")
     
@@ -489,30 +1310,47 @@ class ElkRealtimePredictor:
         if not self.connected or not prediction['success']:
             return False
         
+        # Index spécialisé pour les prédictions
+        index_name = f"binance-predictions-{datetime.now().strftime('%Y.%m')}"
+        doc = None
         try:
-            # Index spécialisé pour les prédictions
-            index_name = f"binance-predictions-{datetime.now().strftime('%Y.%m')}"
             
             # Document à indexer
             doc = {
                 '@timestamp': prediction['timestamp'].isoformat(),
-                'data_timestamp': prediction['data_timestamp'].isoformat() if isinstance(prediction.get('data_timestamp'), (pd.Timestamp, datetime)) else prediction.get('data_timestamp'),
+                'data_timestamp': prediction['data_timestamp'].isoformat() if isinstance(prediction.get('data_timestamp'), datetime) else prediction.get('data_timestamp'),
                 'symbol': prediction['symbol'],
+                # Symbole d'entraînement du modèle (différent pour les autres symboles du cycle)
+                'model_symbol': prediction.get('model_symbol', prediction['symbol']),
                 'current_price': prediction['current_price'],
                 'predicted_next_price': prediction['predicted_next_price'],
                 'price_change': prediction['price_change'],
                 'price_change_pct': prediction['price_change_pct'],
-                'model_score': prediction['model_score'],
+                'model_score': prediction['model_score_val'],
                 'data_points_used': prediction['data_points_used'],
                 'prediction_type': 'realtime_xgboost',
                 'service_version': '1.0',
-                # Signaux de trading
-                'trading_signal': self._get_trading_signal(prediction['price_change_pct']),
-                'signal_strength': self._get_signal_strength(prediction['price_change_pct']),
+                # Signaux de trading, pondérés par l'intervalle de prédiction
+                'trading_signal': prediction['trading_signal'],
+                'signal_strength': prediction['signal_strength'],
                 # Métadonnées
                 'prediction_interval_seconds': 3600,  # 1h par défaut
-                'model_features': 15,  # Nombre de features utilisées
-                'confidence_level': min(1.0, max(0.0, 1.0 - prediction['model_score']))
+                'model_features': prediction.get('model_features'),  # Nombre de features utilisées
+                # Intervalle calibré du modèle multi-quantiles et probabilité de la direction prédite
+                'prediction_interval': prediction.get('prediction_interval'),
+                'confidence_level': prediction.get('direction_confidence'),
+                # Timings des étapes du cycle (l'écriture ES est mesurée dans les métriques)
+                'stage_timings_ms': prediction.get('stage_timings_ms', {}),
+                # Latence de bout en bout par étape et fraîcheur des données (ms)
+                'latency_trace_ms': prediction.get('latency_trace_ms', {}),
+                'data_freshness_ms': prediction.get('latency_trace_ms', {}).get('data_freshness'),
+                'data_source': prediction.get('data_source', 'elasticsearch'),
+                # Précision glissante des prédictions précédentes, jointes aux clôtures réalisées
+                'model_version': prediction.get('model_version'),
+                'online_accuracy': prediction.get('online_accuracy', {}),
+                # Trajectoire récursive : prix prédit de chaque heure à venir
+                'forecast_horizon_hours': prediction.get('forecast_horizon_hours'),
+                'forecast_trajectory': prediction.get('forecast_trajectory', [])
             }
             
             # Indexer dans Elasticsearch
@@ -522,38 +1360,72 @@ class ElkRealtimePredictor:
             )
             
             self.logger.info(f"📊 Prédiction sauvée dans Elasticsearch: {index_name}")
+            self._flush_pending_predictions(index_name)
             return True
             
         except Exception as e:
             self.logger.error(f"❌ Erreur sauvegarde Elasticsearch: {e}")
+            if doc is not None:
+                # Conservée et réécrite dès qu'Elasticsearch répond à nouveau
+                self.pending_predictions.append(doc)
+                self.metrics.set_gauge('predictor_es_pending_predictions', len(self.pending_predictions))
             return False
     
-    def _get_trading_signal(self, price_change_pct: float) -> str:
-        """Déterminer le signal de trading basé sur le changement de prix"""
-        if price_change_pct > 2:
+    def _flush_pending_predictions(self, index_name: str):
+        """Réécrire en un seul bulk les prédictions non sauvées pendant l'indisponibilité"""
+        if not self.pending_predictions:
+            return
+        documents = list(self.pending_predictions)
+        try:
+            response = self.es_client.bulk_index(index_name, documents)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Réécriture des prédictions en attente échouée: {e}")
+            return
+        self.pending_predictions.clear()
+        self.metrics.set_gauge('predictor_es_pending_predictions', 0)
+        failed = sum(1 for item in response.get('items', []) if item.get('index', {}).get('error'))
+        self.logger.info(f"📊 {len(documents) - failed}/{len(documents)} prédictions en attente réécrites")
+    
+    def _get_trading_signal(self, price_change_pct: float, confidence: Optional[float] = None) -> str:
+        """
+        Déterminer le signal de trading basé sur le changement de prix
+        
+        confidence: probabilité de la direction prédite (intervalle) ; en dessous de
+        MIN_SIGNAL_CONFIDENCE → HOLD, signal fort seulement si tout l'intervalle est
+        du côté de la médiane
+        """
+        if confidence is not None and confidence < MIN_SIGNAL_CONFIDENCE:
+            return "HOLD"
+        one_sided = confidence is None or confidence >= STRONG_SIGNAL_CONFIDENCE
+        if price_change_pct > 2 and one_sided:
             return "STRONG_BUY"
         elif price_change_pct > 0.5:
             return "BUY"
-        elif price_change_pct < -2:
+        elif price_change_pct < -2 and one_sided:
             return "STRONG_SELL"
         elif price_change_pct < -0.5:
             return "SELL"
         else:
             return "HOLD"
     
-    def _get_signal_strength(self, price_change_pct: float) -> float:
-        """Calculer la force du signal (0-1)"""
+    def _get_signal_strength(self, price_change_pct: float, confidence: Optional[float] = None) -> float:
+        """Calculer la force du signal (0-1), pondérée par la confiance de l'intervalle"""
         abs_change = abs(price_change_pct)
         if abs_change > 5:
-            return 1.0
+            strength = 1.0
         elif abs_change > 2:
-            return 0.8
+            strength = 0.8
         elif abs_change > 1:
-            return 0.6
+            strength = 0.6
         elif abs_change > 0.5:
-            return 0.4
+            strength = 0.4
         else:
-            return 0.2
+            strength = 0.2
+        if confidence is None:
+            return strength
+        # 0 pour une direction incertaine (0.5), 1 pour un intervalle entièrement d'un côté
+        weight = (confidence - 0.5) / (STRONG_SIGNAL_CONFIDENCE - 0.5)
+        return round(strength * min(1.0, max(0.0, weight)), 3)
 
     def save_predictions_history(self, filename: str = None):
         """Sauvegarder l'historique des prédictions"""
@@ -571,7 +1443,7 @@ class ElkRealtimePredictor:
             for pred in self.predictions_history:
                 pred_copy = pred.copy()
                 pred_copy['timestamp'] = pred_copy['timestamp'].isoformat()
-                if isinstance(pred_copy.get('data_timestamp'), (pd.Timestamp, datetime)):
+                if isinstance(pred_copy.get('data_timestamp'), datetime):
                     pred_copy['data_timestamp'] = pred_copy['data_timestamp'].isoformat()
                 history_json.append(pred_copy)
             
@@ -604,22 +1476,31 @@ class ElkRealtimePredictor:
         try:
             while prediction_count < max_predictions:
                 start_time = time.time()
+                self.stage_timings = {}
+                self.latency_traces = {}
                 
                 self.logger.info(f"\n🔄 Prédiction #{prediction_count + 1} à {datetime.now().strftime('%H:%M:%S')}")
                 
-                # Récupérer les données fraîches
-                df = self.get_latest_binance_data(hours_back=168, limit=50000)
-                
-                if len(df) < 20:
-                    self.logger.warning(f"⚠️ Pas assez de données: {len(df)} points")
-                    self.logger.info("💡 Vérifiez que le binance-backend collecte bien les données")
-                else:
-                    # Faire la prédiction
-                    prediction = self.make_prediction(df)
+                with self._profile_cycle(prediction_count + 1):
+                    # Récupérer les données fraîches de tous les symboles en une requête
+                    with self._stage('es_fetch'):
+                        candles = self.get_latest_candles(self._cycle_symbols(), hours_back=168)
+                        df = self._primary_frame(candles)
                     
-                    # Afficher le résultat
-                    self.display_prediction(prediction)
+                    if len(df) < 20:
+                        self.logger.warning(f"⚠️ Pas assez de données: {len(df)} points")
+                        self.logger.info("💡 Vérifiez que le binance-backend collecte bien les données")
+                    else:
+                        # Faire la prédiction
+                        prediction = self.make_prediction(df)
+                        
+                        # Afficher le résultat
+                        self.display_prediction(prediction)
+                        
+                        # Autres symboles : même modèle, mêmes bougies
+                        self.predict_symbols(candles, prediction)
                 
+                self.metrics.observe('predictor_cycle_duration_seconds', time.time() - start_time)
                 prediction_count += 1
                 
                 # Pause avant la prochaine prédiction
@@ -653,12 +1534,50 @@ def main():
                        help='Faire une seule prédiction et arrêter')
     parser.add_argument('--test-connection', action='store_true',
                        help='Tester uniquement la connexion ELK')
+    parser.add_argument('--inference-only', action='store_true',
+                       help="Avec --single: prédire depuis le modèle et les bougies persistés, sans entraînement")
+    parser.add_argument('--stream', action='store_true',
+                       help='Prédire à chaque trade en suivant le fichier NDJSON du backend')
+    parser.add_argument('--stream-file', default=None,
+                       help='Fichier NDJSON à suivre (défaut: /shared/data/<symbole>.ndjson)')
+    parser.add_argument('--stream-from-start', action='store_true',
+                       help='Rejouer le fichier depuis le début au lieu de suivre la fin')
+    parser.add_argument('--candle-seconds', type=int, default=3600,
+                       help='Durée des bougies du modèle en mode streaming (défaut: 3600)')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                       help='Exposer /metrics et /health sur ce port (défaut: désactivé)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Dumper cProfile et tracemalloc à chaque cycle')
+    parser.add_argument('--profile-dir', default='logs/profile',
+                       help='Répertoire des profils (défaut: logs/profile)')
     
     args = parser.parse_args()
     
     # Initialiser le service
     predictor = ElkRealtimePredictor(args.config)
     
+    if args.metrics_port:
+        start_metrics_server(predictor.metrics, args.metrics_port)
+        predictor.logger.info(f"📈 Métriques exposées sur :{args.metrics_port}/metrics")
+    
+    if args.profile:
+        predictor.enable_profiling(args.profile_dir)
+    
+    if args.stream:
+        from streaming_predictor import StreamingPredictor
+        StreamingPredictor(predictor, args.stream_file, args.candle_seconds).run(from_start=args.stream_from_start)
+        return
+    
+    if args.single and args.inference_only:
+        # Inférence seule : la prédiction ne dépend ni d'Elasticsearch ni de l'entraînement
+        predictor.logger.info("⚡ Mode inférence seule")
+        prediction = predictor.predict_from_artifacts()
+        predictor.display_prediction(prediction)
+        if prediction['success'] and predictor.connect_elasticsearch():
+            predictor.save_prediction_to_elasticsearch(prediction)
+        predictor.save_predictions_history()
+        return
+    
     # Tester la connexion
     if not predictor.connect_elasticsearch():
         sys.exit(1)
@@ -670,14 +1589,18 @@ def main():
     if args.single:
         # Prédiction unique
         predictor.logger.info("🎯 Mode prédiction unique")
-        df = predictor.get_latest_binance_data(hours_back=168, limit=50000)
-        
-        if len(df) < 20:
-            predictor.logger.error("❌ Pas assez de données pour prédiction")
-            return
-        
-        prediction = predictor.make_prediction(df)
-        predictor.display_prediction(prediction)
+        with predictor._profile_cycle(1):
+            with predictor._stage('es_fetch'):
+                candles = predictor.get_latest_candles(predictor._cycle_symbols(), hours_back=168)
+                df = predictor._primary_frame(candles)
+            
+            if len(df) < 20:
+                predictor.logger.error("❌ Pas assez de données pour prédiction")
+                return
+            
+            prediction = predictor.make_prediction(df)
+            predictor.display_prediction(prediction)
+            predictor.predict_symbols(candles, prediction)
         predictor.save_predictions_history()
         
     else:
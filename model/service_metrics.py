@@ -0,0 +1,154 @@
+"""
+Métriques du service de prédiction
+==================================
+
+Registre minimal (sans dépendance externe) de compteurs, jauges et histogrammes,
+exposé au format texte Prometheus sur /metrics, avec un /health pour les sondes
+Kubernetes.
+
+Utilisation:
+    metrics = MetricsRegistry()
+    metrics.observe('predictor_stage_duration_seconds', 0.12, stage='es_fetch')
+    start_metrics_server(metrics, port=8080)
+"""
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+# Buckets par défaut (secondes) : de la sous-milliseconde à la minute
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Histogramme cumulatif à buckets fixes (observe en O(log buckets))"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimation d'un quantile (borne supérieure du bucket concerné)"""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float('inf')
+
+
+class MetricsRegistry:
+    """Registre thread-safe des métriques du service"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, tuple], float] = {}
+        self._gauges: Dict[Tuple[str, tuple], float] = {}
+        self._histograms: Dict[Tuple[str, tuple], Histogram] = {}
+        self._help: Dict[str, str] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, str]) -> Tuple[str, tuple]:
+        return name, tuple(sorted(labels.items()))
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        with self._lock:
+            key = self._key(name, labels)
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[self._key(name, labels)] = float(value)
+
+    def observe(self, name: str, value: float, buckets: Optional[Tuple[float, ...]] = None, **labels):
+        with self._lock:
+            key = self._key(name, labels)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets or DEFAULT_BUCKETS)
+            histogram.observe(value)
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        return self._histograms.get(self._key(name, labels))
+
+    @staticmethod
+    def _format_labels(labels: tuple, extra: Optional[Tuple[str, str]] = None) -> str:
+        items = list(labels) + ([extra] if extra else [])
+        if not items:
+            return ''
+        return '{' + ','.join(f'{k}="{v}"' for k, v in items) + '}'
+
+    def render_prometheus(self) -> str:
+        """Exporter toutes les métriques au format texte Prometheus"""
+        lines = []
+        seen = set()
+
+        def header(name: str, metric_type: str):
+            if name in seen:
+                return
+            seen.add(name)
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                header(name, 'counter')
+                lines.append(f"{name}{self._format_labels(labels)} {value}")
+            for (name, labels), value in sorted(self._gauges.items()):
+                header(name, 'gauge')
+                lines.append(f"{name}{self._format_labels(labels)} {value}")
+            for (name, labels), hist in sorted(self._histograms.items(), key=lambda kv: kv[0]):
+                header(name, 'histogram')
+                cumulative = 0
+                for bound, count in zip(hist.buckets, hist.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{self._format_labels(labels, ('le', repr(bound)))} {cumulative}")
+                lines.append(f"{name}_bucket{self._format_labels(labels, ('le', '+Inf'))} {hist.count}")
+                lines.append(f"{name}_sum{self._format_labels(labels)} {hist.sum}")
+                lines.append(f"{name}_count{self._format_labels(labels)} {hist.count}")
+        return '\n'.join(lines) + '\n'
+
+
+def start_metrics_server(registry: MetricsRegistry, port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Démarrer le serveur HTTP /metrics + /health dans un thread daemon"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith('/metrics'):
+                body = registry.render_prometheus().encode()
+                content_type = 'text/plain; version=0.0.4'
+            elif self.path.startswith('/health'):
+                body = b'ok\n'
+                content_type = 'text/plain'
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,318 @@
+"""
+Inférence streaming tick par tick
+=================================
+
+Consomme les trades au fil de leur écriture par binance-backend (suivi du fichier
+NDJSON du volume partagé), construit les bougies au vol et score le modèle
+persisté à chaque trade :
+
+- Fenêtre glissante de clôtures (taille fixe) : seule la dernière valeur change
+  entre deux trades, la ligne de features est recalculée sur cette fenêtre
+- Score d'une seule ligne avec Booster.inplace_predict (pas de DMatrix, pas de pandas) ;
+  modèle multi-quantiles : médiane + intervalle calibré, qui pondère le signal
+- Histogramme de latence trade_time (horodatage Binance) → prédiction disponible
+- Si le modèle utilise la microstructure, celle de la bougie en cours est relue
+  dans le ring mmap des bougies à chaque bougie courte publiée par le backend
+
+Utilisation:
+    python realtime_prediction_service.py --stream
+    python realtime_prediction_service.py --stream --stream-file /shared/data/eth_usdt.ndjson
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from realtime_prediction_service import MODEL_FILE, META_FILE, CANDLES_FILE, QUANTILES
+
+# Nombre de clôtures nécessaires à une ligne de features (MACD 26 + marge)
+FEATURE_WINDOW = 30
+
+# Buckets de latence (secondes) : de 100 µs à 5 s
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+def default_stream_file(symbol: str, data_dir: str = '/shared/data') -> str:
+    """Fichier NDJSON écrit par ws_binance.py pour un symbole (BTCUSDT → btc_usdt.ndjson)"""
+    symbol = symbol.lower()
+    if symbol.endswith('usdt'):
+        return os.path.join(data_dir, f"{symbol[:-4]}_usdt.ndjson")
+    return os.path.join(data_dir, f"{symbol}.ndjson")
+
+
+def follow(path: str, from_start: bool = False, poll_interval: float = 0.01) -> Iterator[bytes]:
+    """
+    Suivre un fichier en croissance (équivalent de `tail -F`).
+
+    Ne renvoie que des lignes complètes ; gère la troncature et le remplacement
+    du fichier (changement d'inode).
+    """
+    while not os.path.exists(path):
+        time.sleep(1)
+
+    f = open(path, 'rb')
+    inode = os.fstat(f.fileno()).st_ino
+    if not from_start:
+        f.seek(0, os.SEEK_END)
+
+    partial = b''
+    try:
+        while True:
+            line = f.readline()
+            if line:
+                if line.endswith(b'\n'):
+                    yield partial + line
+                    partial = b''
+                else:
+                    partial += line
+                continue
+
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                time.sleep(poll_interval)
+                continue
+            if stat.st_ino != inode or stat.st_size < f.tell():
+                f.close()
+                f = open(path, 'rb')
+                inode = os.fstat(f.fileno()).st_ino
+                partial = b''
+                continue
+            time.sleep(poll_interval)
+    finally:
+        f.close()
+
+
+class StreamingPredictor:
+    """Prédictions à chaque trade à partir du modèle persisté par ElkRealtimePredictor"""
+
+    def __init__(self, predictor, stream_file: Optional[str] = None, interval_seconds: int = 3600):
+        self.predictor = predictor
+        self.logger = predictor.logger
+        self.metrics = predictor.metrics
+        self.artifacts_dir = predictor.config['artifacts_dir']
+        self.stream_file = stream_file or predictor.config.get('stream_file') or default_stream_file(predictor.config['symbol'])
+        self.interval_ms = interval_seconds * 1000
+
+        self.metrics.describe('predictor_stream_latency_seconds', "Latence trade Binance → prédiction disponible")
+        self.metrics.describe('predictor_stream_inference_seconds', "Durée features + inplace_predict d'une mise à jour")
+
+        self.booster = None
+        self.iteration_range = (0, 0)
+        self.model_mtime = 0.0
+        self.lookback = 10
+        self.scaler = None
+        # Modèle multi-quantiles : correction conforme des bornes (None : une seule sortie)
+        self.interval_adjustment = None
+
+        # Microstructure alignée sur la fenêtre (seule la dernière ligne sert à la prédiction)
+        self.micro = None
+        self.candle_ring = None
+        self.micro_seq = None
+
+        # window[:-1] = clôtures des bougies fermées, window[-1] = prix courant de la bougie en cours
+        self.window = np.zeros(FEATURE_WINDOW + 1, dtype=np.float64)
+        self.current_bucket = None
+        self.last_prediction = None
+        self.last_interval = None
+        self.updates = 0
+
+    # ------------------------------------------------------------------ modèle
+
+    def load_model(self) -> bool:
+        """(Re)charger le booster et le scaler si le modèle a changé sur disque"""
+        import xgboost as xgb
+
+        model_path = os.path.join(self.artifacts_dir, MODEL_FILE)
+        mtime = os.path.getmtime(model_path)
+        if mtime == self.model_mtime:
+            return False
+
+        booster = xgb.Booster()
+        booster.load_model(model_path)
+        best_iteration = booster.attr('best_iteration')
+        n_rounds = int(best_iteration) + 1 if best_iteration is not None else booster.num_boosted_rounds()
+
+        with open(os.path.join(self.artifacts_dir, META_FILE), 'r') as f:
+            meta = json.load(f)
+        scaler = meta['scaler']
+        range_min, range_max = scaler['feature_range']
+        data_range = (scaler['data_max'] - scaler['data_min']) or 1.0
+        new_scaler = (scaler['data_min'], (range_max - range_min) / data_range, range_min)
+
+        if self.scaler is not None and self.current_bucket is not None:
+            # Fenêtre déjà alimentée par le flux : la ré-exprimer avec le nouveau scaler
+            self.window[:] = self._scale(self._unscale(self.window), new_scaler)
+
+        self.booster = booster
+        self.iteration_range = (0, n_rounds)
+        self.lookback = meta['lookback']
+        self.scaler = new_scaler
+        # Artefacts antérieurs aux quantiles : une seule sortie, pas d'intervalle
+        self.interval_adjustment = None
+        if meta.get('quantiles') == list(QUANTILES):
+            self.interval_adjustment = meta.get('interval_adjustment', 0.0)
+        n_micro = len(meta.get('microstructure_features', []))
+        if n_micro == 0:
+            self.micro = None
+        elif self.micro is None or self.micro.shape[1] != n_micro:
+            self.micro = np.full((len(self.window), n_micro), np.nan)
+            self.micro_seq = None
+        self.model_mtime = mtime
+        self.logger.info(f"📦 Modèle chargé (entraîné le {meta['trained_at']}, {n_rounds} itérations)")
+        return True
+
+    def warm_up(self):
+        """Amorcer la fenêtre avec les dernières bougies persistées (la dernière est en cours)"""
+        with open(os.path.join(self.artifacts_dir, CANDLES_FILE), 'r') as f:
+            candles = json.load(f)
+        closes = np.asarray(candles['closes'][-len(self.window):], dtype=np.float64)
+        if len(closes) < len(self.window):
+            raise ValueError(f"Pas assez de bougies en cache: {len(closes)} < {len(self.window)}")
+
+        self.window[:] = self._scale(closes)
+        if self.micro is not None and candles.get('microstructure'):
+            rows = np.array(candles['microstructure'][-len(self.window):], dtype=np.float64)
+            self.micro[-len(rows):] = rows
+        last_date = datetime.fromisoformat(candles['dates'][-1])
+        self.current_bucket = int(last_date.timestamp() * 1000) // self.interval_ms
+
+    def _scale(self, price, scaler=None):
+        data_min, scale, range_min = scaler or self.scaler
+        return (price - data_min) * scale + range_min
+
+    def _unscale(self, value, scaler=None):
+        data_min, scale, range_min = scaler or self.scaler
+        return (value - range_min) / scale + data_min
+
+    # ------------------------------------------------------------------ flux
+
+    def on_trade(self, trade_time_ms: int, price: float) -> Tuple[float, float]:
+        """
+        Intégrer un trade et prédire le prochain prix de clôture.
+
+        Retourne (prix prédit, latence en secondes depuis trade_time).
+        """
+        bucket = trade_time_ms // self.interval_ms
+        if bucket > self.current_bucket:
+            self.on_candle_close(bucket - self.current_bucket)
+            self.current_bucket = bucket
+        elif bucket < self.current_bucket:
+            # Trade d'une bougie déjà fermée : la fenêtre n'est plus modifiable
+            return self.last_prediction, 0.0
+
+        start = time.perf_counter()
+        self.window[-1] = self._scale(price)
+        self._refresh_microstructure()
+        row = np.asarray(self.predictor._feature_row(self.window, len(self.window), self.lookback, self.micro),
+                         dtype=np.float32)
+        predicted_scaled = self.booster.inplace_predict(row.reshape(1, -1), iteration_range=self.iteration_range)
+        if self.interval_adjustment is None:
+            predicted = float(self._unscale(np.ravel(predicted_scaled)[0]))
+        else:
+            lower, median, upper = self._unscale(
+                self.predictor._calibrated_quantiles(np.atleast_2d(predicted_scaled), self.interval_adjustment)[0]
+            )
+            predicted = float(median)
+            self.last_interval = (float(lower), float(upper))
+        done = time.perf_counter()
+
+        latency = time.time() - trade_time_ms / 1000
+        self.metrics.observe('predictor_stream_inference_seconds', done - start, buckets=LATENCY_BUCKETS)
+        self.metrics.observe('predictor_stream_latency_seconds', max(latency, 0.0), buckets=LATENCY_BUCKETS)
+        self.metrics.set_gauge('predictor_stream_predicted_price', predicted, symbol=self.predictor.config['symbol'])
+
+        self.last_prediction = predicted
+        self.updates += 1
+        return predicted, latency
+
+    def on_candle_close(self, closed: int = 1):
+        """
+        Bougie(s) fermée(s) : décaler la fenêtre et recharger le modèle s'il a été réentraîné.
+
+        Sans trade pendant plusieurs intervalles, les bougies vides reprennent le dernier prix.
+        """
+        closed_price = self._unscale(self.window[-1])
+        if self.last_prediction is not None:
+            change_pct = (self.last_prediction - closed_price) / closed_price * 100
+            confidence, interval = None, ""
+            if self.last_interval is not None:
+                lower, upper = self.last_interval
+                confidence = self.predictor._direction_confidence(closed_price, lower, self.last_prediction, upper)
+                interval = f" [{lower:,.2f}$ ; {upper:,.2f}$]"
+            self.logger.info(
+                f"🕯️ Bougie fermée {closed_price:,.2f}$ → prédiction {self.last_prediction:,.2f}${interval} "
+                f"({change_pct:+.2f}%, {self.predictor._get_trading_signal(change_pct, confidence)})"
+            )
+        for _ in range(min(closed, len(self.window))):
+            self.window[:-1] = self.window[1:]
+            if self.micro is not None:
+                self.micro[:-1] = self.micro[1:]
+                self.micro[-1] = np.nan
+        self.micro_seq = None
+
+        try:
+            self.load_model()
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"⚠️ Rechargement du modèle impossible: {e}")
+
+    def _refresh_microstructure(self):
+        """Microstructure de la bougie en cours, recalculée quand le ring des bougies avance"""
+        if self.micro is None:
+            return
+        from microstructure import hourly_microstructure, stable_copy
+        from tick_ring_reader import TickRingReader
+
+        if self.candle_ring is None:
+            try:
+                self.candle_ring = TickRingReader.for_symbol(self.predictor.config['symbol'], 'candles')
+            except (OSError, ValueError):
+                return
+        if self.candle_ring.write_seq == self.micro_seq:
+            return
+        # Bougies courtes d'au moins 1 s : la bougie en cours en contient au plus interval/1 s
+        try:
+            candles, seq = stable_copy(self.candle_ring, self.interval_ms // 1000)
+        except (OSError, ValueError) as e:
+            # Ring recréé par le backend et pas encore lisible : nouvel essai au prochain trade
+            self.logger.warning(f"⚠️ Ring des bougies indisponible: {e}")
+            self.candle_ring = None
+            return
+        start_ms = np.array([self.current_bucket * self.interval_ms], dtype=np.int64)
+        self.micro[-1] = hourly_microstructure(candles, start_ms, self.interval_ms)[0]
+        self.micro_seq = seq
+
+    def _log_summary(self):
+        latency = self.metrics.histogram('predictor_stream_latency_seconds')
+        inference = self.metrics.histogram('predictor_stream_inference_seconds')
+        if latency is None or inference is None:
+            return
+        self.logger.info(
+            f"⚡ {self.updates} mises à jour | inférence p50 ≤{inference.quantile(0.5) * 1000:.2f}ms "
+            f"p99 ≤{inference.quantile(0.99) * 1000:.2f}ms | latence trade→prédiction "
+            f"p50 ≤{latency.quantile(0.5) * 1000:.1f}ms p99 ≤{latency.quantile(0.99) * 1000:.1f}ms"
+        )
+
+    def run(self, from_start: bool = False, summary_every: int = 1000):
+        """Boucle principale : suivre le fichier de trades et prédire à chaque trade"""
+        self.load_model()
+        self.warm_up()
+        self.logger.info(f"📡 Streaming {self.stream_file} (bougies {self.interval_ms // 1000}s)")
+
+        try:
+            for line in follow(self.stream_file, from_start=from_start):
+                try:
+                    trade = json.loads(line)
+                    trade_time, price = int(trade['trade_time']), float(trade['price'])
+                except (ValueError, KeyError, TypeError):
+                    continue
+                self.on_trade(trade_time, price)
+                if self.updates and self.updates % summary_every == 0:
+                    self._log_summary()
+        except KeyboardInterrupt:
+            self.logger.info("\n⏹️ Arrêt du streaming")
+        self._log_summary()
@@ -0,0 +1,162 @@
+"""
+Lecture des ring buffers mmap écrits par binance-backend
+========================================================
+
+Accès sans réseau aux trades et bougies les plus récents via le volume partagé.
+Le format (en-tête + zone miroir) est décrit dans binance-backend/tick_ring.py ;
+les dtypes ci-dessous doivent rester identiques aux formats struct de l'écrivain.
+
+Utilisation:
+    reader = TickRingReader.for_symbol('BTCUSDT', kind='trades')
+    trades, seq = reader.latest(500)          # vue NumPy, aucune copie
+    prices = trades['price']
+    if not reader.still_valid(seq, len(trades)):
+        ...  # l'écrivain a réécrit ces slots entre-temps : relire
+
+Un lecteur peut rester ouvert longtemps : latest() revérifie l'en-tête et la taille
+du fichier et re-mappe le ring si le backend l'a recréé avec une autre disposition.
+"""
+
+import os
+import mmap
+from typing import Tuple
+
+import numpy as np
+
+RING_DIR = os.getenv('RING_DIR', '/shared/ring')
+RING_MAGIC = b'TKRG'
+RING_VERSION = 3
+HEADER_SIZE = 64
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'), ('version', '<u4'), ('record_size', '<u4'), ('pad', '<u4'),
+    ('capacity', '<u8'), ('write_seq', '<u8'),
+])
+
+TRADE_DTYPE = np.dtype([
+    ('trade_time', '<i8'), ('event_time', '<i8'), ('trade_id', '<i8'),
+    ('price', '<f8'), ('quantity', '<f8'), ('buyer_market_maker', '<i8'),
+    ('ingest_time_ms', '<i8'),
+])
+
+CANDLE_DTYPE = np.dtype([
+    ('open_time', '<i8'), ('close_time', '<i8'), ('open', '<f8'), ('high', '<f8'),
+    ('low', '<f8'), ('close', '<f8'), ('volume', '<f8'), ('trade_count', '<i8'),
+    ('last_trade_time', '<i8'), ('last_ingest_time_ms', '<i8'), ('emitted_time_ms', '<i8'),
+    ('buy_volume', '<f8'), ('sell_volume', '<f8'), ('quote_volume', '<f8'),
+    ('size_counts', '<i8', (4,)),
+    ('gap_mean_ms', '<f8'), ('gap_m2', '<f8'), ('gap_max_ms', '<f8'),
+])
+
+RECORD_DTYPES = {'trades': TRADE_DTYPE, 'candles': CANDLE_DTYPE}
+
+
+class TickRingReader:
+    """Lecteur (sans verrou) d'un ring buffer mmap à zone miroir"""
+
+    def __init__(self, path: str, dtype: np.dtype):
+        self.path = path
+        self.dtype = dtype
+        self._mm = None
+        self._open()
+
+    def _open(self):
+        """Mapper le fichier et valider l'en-tête contre le dtype et la taille du fichier"""
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < HEADER_SIZE:
+                raise ValueError(f"Ring buffer tronqué: {self.path}")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header_view = np.frombuffer(mm, dtype=HEADER_DTYPE, count=1)
+        header = header_view[0]
+        error = None
+        if header['magic'] != RING_MAGIC or header['version'] != RING_VERSION:
+            error = f"Ring buffer invalide: {self.path}"
+        elif header['record_size'] != self.dtype.itemsize:
+            error = f"Taille d'enregistrement {header['record_size']} != {self.dtype.itemsize} ({self.path})"
+        elif HEADER_SIZE + 2 * int(header['capacity']) * self.dtype.itemsize != stat.st_size:
+            # Écrivain en cours de (ré)initialisation : taille et en-tête pas encore cohérents
+            error = f"Taille de ring incohérente avec l'en-tête: {self.path}"
+        if error:
+            header = header_view = None
+            mm.close()
+            raise ValueError(error)
+
+        self._mm = mm
+        self._header = header_view
+        self._identity = (stat.st_ino, stat.st_size)
+        self.capacity = int(header['capacity'])
+        self._records = np.frombuffer(mm, dtype=self.dtype, count=2 * self.capacity, offset=HEADER_SIZE)
+
+    def _layout_changed(self) -> bool:
+        """True si le fichier a été recréé, redimensionné ou réinitialisé depuis l'ouverture"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return True
+        if (stat.st_ino, stat.st_size) != self._identity:
+            return True
+        header = self._header[0]
+        return (header['magic'] != RING_MAGIC or header['version'] != RING_VERSION
+                or header['record_size'] != self.dtype.itemsize or int(header['capacity']) != self.capacity)
+
+    def reopen(self):
+        """Re-mapper le ring (ValueError si sa nouvelle disposition est invalide)"""
+        # Pas de close() : des vues rendues par latest() peuvent encore référencer
+        # l'ancien mapping, libéré avec la dernière d'entre elles
+        self._records = self._header = self._mm = None
+        self._open()
+
+    @classmethod
+    def for_symbol(cls, symbol: str, kind: str = 'trades', ring_dir: str = RING_DIR) -> 'TickRingReader':
+        """Ouvrir le ring 'trades' ou 'candles' d'un symbole (ex: BTCUSDT)"""
+        path = os.path.join(ring_dir, f"{symbol.lower()}.{kind}.ring")
+        return cls(path, RECORD_DTYPES[kind])
+
+    @property
+    def write_seq(self) -> int:
+        """Nombre total d'enregistrements publiés par l'écrivain"""
+        return int(self._header['write_seq'][0])
+
+    def latest(self, n: int) -> Tuple[np.ndarray, int]:
+        """
+        Retourner les n derniers enregistrements (ordre chronologique) sans copie.
+
+        Au plus capacité - 1 : le slot suivant le dernier publié est celui que
+        l'écrivain remplit, il ne peut pas faire partie d'une lecture cohérente.
+
+        La vue pointe directement dans le mmap : elle reste lisible mais peut être
+        réécrite par l'écrivain. Utiliser still_valid() après lecture, ou .copy()
+        pour conserver les données.
+
+        Re-mappe le ring si le backend l'a recréé (autre capacité, version ou
+        fichier) : un mapping périmé lirait des données décalées, ou provoquerait
+        un SIGBUS sur un fichier raccourci.
+
+        Returns:
+            (vue NumPy structurée, write_seq au moment de la lecture)
+        """
+        if self._layout_changed():
+            self.reopen()
+        seq = self.write_seq
+        n = min(n, seq, self.capacity - 1)
+        # Grâce au miroir, les slots [end - n, end) sont contigus avec end dans [capacité, 2×capacité)
+        end = seq % self.capacity + self.capacity
+        return self._records[end - n:end], seq
+
+    def still_valid(self, seq: int, n: int) -> bool:
+        """
+        True si les n enregistrements lus à write_seq=seq n'ont pas été réécrits.
+
+        Après k publications, l'écrivain a écrit les slots des k + 1 enregistrements
+        suivant seq (le dernier en cours d'écriture) : il faut k + 1 <= capacité - n.
+        """
+        return self.write_seq - seq < self.capacity - n
+
+    def close(self):
+        self._records = None
+        self._header = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None